@@ -0,0 +1,249 @@
+import os
+import sys
+import json
+import time
+import random
+import tempfile
+import argparse
+import NotRouge_game_core # Import the core game logic
+
+# --- Benchmark Constants ---
+BASELINE_FILE = "NotRouge_bench_baseline.json"
+DEFAULT_THRESHOLD = 10.0 # Percent slower than the baseline that counts as a regression
+LARGE_FILE_LINES = 20000 # Lines in the generated content files for the loader benchmarks
+LARGE_INVENTORY_SIZE = 200 # Items carried in the save/load and handle_death benchmarks
+
+NULL_SINK = NotRouge_game_core.NULL_SINK
+
+# --- Benchmark Registry ---
+# Each benchmark is a setup function that receives a scratch directory and
+# returns a zero-argument callable: the operation being timed.
+
+BENCHMARKS = {}
+
+def benchmark(name):
+    """Registers a benchmark setup function under a name."""
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+def _fresh_enemy(name):
+    for template in NotRouge_game_core.DUNGEON_ENEMIES:
+        if template.name == name:
+            return template.spawn()
+    raise KeyError(name)
+
+def _loaded_player(level):
+    """A player at the given level carrying a large inventory with gear equipped."""
+    player = NotRouge_game_core.create_player_at_level(level)
+    items = NotRouge_game_core.SHOP_ITEMS
+    for i in range(LARGE_INVENTORY_SIZE):
+        item = items[i % len(items)]
+        player.inventory.append(NotRouge_game_core.Item(item.name, item.item_type, item.cost, item.attack_bonus,
+                                                        item.defense_bonus, item.health_bonus, item.heal_amount))
+    for slot in player.equipped:
+        gear = next((item for item in player.inventory if item.item_type == slot), None)
+        if gear:
+            player.equip_item(gear, NULL_SINK)
+    return player
+
+def _write_large_file(source, destination, lines):
+    """Writes a content file of roughly `lines` entries by repeating a shipped one."""
+    with open(source, "r") as f:
+        entries = [line for line in f if line.strip() and not line.startswith("#")]
+    with open(destination, "w") as f:
+        for i in range(lines):
+            f.write(entries[i % len(entries)])
+
+@benchmark("combat_turn")
+def _bench_combat_turn(scratch):
+    rng = random.Random(1)
+    player = NotRouge_game_core.create_player_at_level(50)
+    enemy = _fresh_enemy("Stone Golem")
+    def op():
+        player.current_health = player.max_health
+        enemy.health = enemy.health_full
+        enemy.take_damage(NotRouge_game_core.roll_player_damage(player, rng), NULL_SINK)
+        player.take_damage(NotRouge_game_core.roll_enemy_damage(enemy, rng), NULL_SINK)
+    return op
+
+@benchmark("full_fight")
+def _bench_full_fight(scratch):
+    rng = random.Random(1)
+    def op():
+        player = NotRouge_game_core.create_player_at_level(5)
+        NotRouge_game_core.resolve_combat(player, _fresh_enemy("Orc"), NULL_SINK, rng)
+    return op
+
+@benchmark("auto_fight_instant")
+def _bench_auto_fight(scratch):
+    rng = random.Random(1)
+    def op():
+        player = NotRouge_game_core.create_player_at_level(5)
+        NotRouge_game_core.resolve_auto_combat(player, _fresh_enemy("Orc"), NULL_SINK, rng, condensed_log=True)
+    return op
+
+@benchmark("dungeon_run")
+def _bench_dungeon_run(scratch):
+    rng = random.Random(1)
+    enemies = NotRouge_game_core.DUNGEON_ENEMIES
+    def op():
+        player = NotRouge_game_core.create_player_at_level(20)
+        NotRouge_game_core.run_dungeon(player, enemies, rng)
+    return op
+
+@benchmark("load_items_large")
+def _bench_load_items(scratch):
+    path = os.path.join(scratch, "large_items.txt")
+    _write_large_file(NotRouge_game_core.DEFAULT_ITEMS_FILE, path, LARGE_FILE_LINES)
+    return lambda: NotRouge_game_core.load_items_from_file(path, NULL_SINK)
+
+@benchmark("load_enemies_large")
+def _bench_load_enemies(scratch):
+    path = os.path.join(scratch, "large_enemies.txt")
+    _write_large_file(NotRouge_game_core.DEFAULT_ENEMIES_FILE, path, LARGE_FILE_LINES)
+    return lambda: NotRouge_game_core.load_enemies_from_file(path, NULL_SINK)
+
+@benchmark("load_items_cached_large")
+def _bench_load_items_cached(scratch):
+    path = os.path.join(scratch, "large_cached_items.txt")
+    _write_large_file(NotRouge_game_core.DEFAULT_ITEMS_FILE, path, LARGE_FILE_LINES)
+    NotRouge_game_core.load_items_cached(path, NULL_SINK) # Build the cache once
+    return lambda: NotRouge_game_core.load_items_cached(path, NULL_SINK)
+
+@benchmark("save_load_roundtrip")
+def _bench_save_load(scratch):
+    path = os.path.join(scratch, "bench_save.json")
+    player = _loaded_player(30)
+    def op():
+        NotRouge_game_core.save_game(player, path, NULL_SINK)
+        NotRouge_game_core.load_game(path, NULL_SINK)
+    return op
+
+@benchmark("save_load_binary")
+def _bench_save_load_binary(scratch):
+    path = os.path.join(scratch, "bench_save" + NotRouge_game_core.BINARY_SAVE_SUFFIX)
+    player = _loaded_player(30)
+    def op():
+        NotRouge_game_core.save_game(player, path, NULL_SINK)
+        NotRouge_game_core.load_game(path, NULL_SINK)
+    return op
+
+@benchmark("journal_save_delta")
+def _bench_journal_save(scratch):
+    journal = NotRouge_game_core.SaveJournal(os.path.join(scratch, "bench_save" + NotRouge_game_core.JOURNAL_SUFFIX))
+    player = _loaded_player(30)
+    journal.save(player, NULL_SINK) # Snapshot once; each op then appends a gold change
+    def op():
+        player.gold += 1
+        journal.save(player, NULL_SINK)
+    return op
+
+@benchmark("handle_death")
+def _bench_handle_death(scratch):
+    rng = random.Random(1)
+    path = os.path.join(scratch, "bench_death_save.json")
+    template = _loaded_player(30)
+    def op():
+        player = NotRouge_game_core.Player(template.name)
+        player.level = template.level
+        player.gold = template.gold
+        player.inventory = list(template.inventory)
+        player.equipped = dict(template.equipped)
+        NotRouge_game_core.handle_death(player, NULL_SINK, rng, path)
+    return op
+
+# --- Running and Comparing ---
+
+def time_operation(op, min_time=0.2, repeats=5):
+    """Returns the best seconds-per-call of op over several timed batches.
+
+    The batch size is grown until one batch takes at least min_time / repeats.
+    """
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            op()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / repeats:
+            break
+        number *= 2
+    best = elapsed / number
+    for _ in range(repeats - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            op()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+def run_benchmarks(names=None, min_time=0.2, out=sys.stdout):
+    """Runs the selected benchmarks and returns {name: seconds per operation}."""
+    results = {}
+    with tempfile.TemporaryDirectory() as scratch:
+        for name in names or BENCHMARKS:
+            op = BENCHMARKS[name](scratch)
+            results[name] = time_operation(op, min_time)
+            out.write(f"{name:<22} {results[name] * 1e6:>12.2f} us/op\n")
+    return results
+
+def compare_to_baseline(results, baseline, threshold):
+    """Returns a list of (name, baseline, current, percent slower) for regressions beyond threshold."""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        slower = (current - previous) / previous * 100
+        if slower > threshold:
+            regressions.append((name, previous, current, slower))
+    return regressions
+
+def load_baseline(path):
+    """Loads {name: seconds per op} from a baseline JSON file."""
+    with open(path, "r") as f:
+        return json.load(f)["results"]
+
+def save_baseline(path, results):
+    """Writes benchmark results as a JSON baseline."""
+    data = {
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": sys.version.split()[0],
+        "unit": "seconds per operation",
+        "results": results,
+    }
+    with open(path, "w") as f:
+        json.dump(data, f, indent=4)
+
+def main(argv=None):
+    NotRouge_game_core.load_content(log_function=None)
+    parser = argparse.ArgumentParser(description="NotRouge hot-path benchmarks with regression checks.")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="Baseline JSON file to compare against.")
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results as the new baseline.")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Percent slowdown that counts as a regression.")
+    parser.add_argument("--only", action="append", choices=sorted(BENCHMARKS), help="Run only this benchmark (repeatable).")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds to spend timing each benchmark.")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.only, args.min_time)
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        print(f"\nBaseline saved to {args.baseline}.")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to create one.")
+        return 0
+
+    regressions = compare_to_baseline(results, load_baseline(args.baseline), args.threshold)
+    if not regressions:
+        print(f"\nNo regressions beyond {args.threshold:.1f}%.")
+        return 0
+    print(f"\nRegressions beyond {args.threshold:.1f}%:")
+    for name, previous, current, slower in regressions:
+        print(f"  {name}: {previous * 1e6:.2f} -> {current * 1e6:.2f} us/op ({slower:+.1f}%)")
+    return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,32 @@
 import os
+import sys
 import random
 import time
 import math
 import NotRouge_game_core # Import the core game logic
 
 # --- Game Constants (Launcher Specific) ---
-SAVE_FILE = "NotRouge_save.json"
-# ITEMS_FILE and ENEMIES_FILE are implicitly used by NotRouge_game_core's internal loading,
-# so they are not directly used here for file loading.
+PROFILES = None # NotRouge_game_core.ProfileStore holding every saved hero, opened at startup
+AUTOSAVE = None # NotRouge_game_core.AutosaveScheduler writing to PROFILES; None disables autosave
+# Items and enemies are loaded through NotRouge_game_core.load_content()
+# (NotRouge_game_core.DEFAULT_ITEMS_FILE / DEFAULT_ENEMIES_FILE).
 
 # --- Utility Functions (Terminal Specific) ---
 
+def autosave(player, reason):
+    """Reports an autosave checkpoint ("room" or "combat"); the save runs in the background."""
+    if AUTOSAVE:
+        AUTOSAVE.checkpoint(player, reason)
+
+def background_saver():
+    """The AsyncSaver behind AUTOSAVE, so saves never hold up the game (None saves directly)."""
+    return AUTOSAVE.saver if AUTOSAVE else None
+
+def save_player(player):
+    """Saves the player under the hero's name in PROFILES, in the background when possible."""
+    saver = background_saver()
+    (saver.save if saver else NotRouge_game_core.save_game)(player, PROFILES, display_message)
+
 def clear_screen():
     """Clears the terminal screen."""
     os.system('cls' if os.name == 'nt' else 'clear')
@@ -36,7 +52,7 @@ def display_stats(player):
     """Prints the player's current stats and equipment to the terminal."""
     clear_screen()
     print(f"--- {player.name}'s Stats ---")
-    print(f"Level: {player.level} (EXP: {player.experience}/{NotRouge_game_core.calculate_level_up_exp(player.level)})")
+    print(f"Level: {player.level} (EXP: {player.experience}/{NotRouge_game_core.LEVEL_CURVE.exp_to_next(player.level)})")
     print(f"Health: {player.current_health}/{player.max_health}")
     print(f"Attack: {player.attack}")
     print(f"Defense: {player.defense}")
@@ -69,9 +85,10 @@ def combat_encounter(player, enemy):
         print("2. Use Item")
         print("3. Flee (50% chance)")
         print("4. Auto-Attack (until enemy dies or 1 HP remaining)")
+        print("5. Resolve Instantly (auto-attack with no waiting)")
 
 
-        choice = get_input("Enter choice (1-4): ", ['1', '2', '3', '4'])
+        choice = get_input("Enter choice (1-5): ", ['1', '2', '3', '4', '5'])
 
         if choice == '1': # Attack
             player_damage = max(1, player.attack + random.randint(-5, 5)) # Add some variance
@@ -158,8 +175,26 @@ def combat_encounter(player, enemy):
             if player.current_health > 0 and enemy.health > 0: # If auto-attack stopped early but combat not over
                 continue # Go back to the main combat menu options
 
+        elif choice == '5': # Resolve Instantly
+            awards = NotRouge_game_core.EventRecorder() # Victory and level-up messages, shown after the fight
+            result = NotRouge_game_core.resolve_auto_combat(player, enemy, awards, condensed_log=True)
+            print("\nAuto-attack resolved instantly:")
+            for line in result.log:
+                print(line)
+            print(result.summary(enemy.name))
+            for event in awards.events:
+                print(event.message())
+            if result.outcome == "stopped":
+                print("\nYour health is critically low (1 HP remaining)! Auto-attack stopped.")
+            elif result.outcome == "stalemate":
+                print("\nNeither of you can get through the other's defense. Auto-attack stopped.")
+            input("Press Enter to continue...")
+            if result.outcome in ("stopped", "stalemate"):
+                continue # Back to the combat menu for manual action (e.g. flee)
+            return True # Combat ended, player won or lost (death is handled by dungeon_adventure)
+
         # Enemy's turn (if still alive and player didn't win or flee or auto-attack finished)
-        if enemy.health > 0 and player.current_health > 0 and choice != '4': # Only enemy turn if not auto-attacking or auto-attack didn't finish the combat
+        if enemy.health > 0 and player.current_health > 0 and choice not in ('4', '5'): # Only enemy turn if not auto-attacking or auto-attack didn't finish the combat
             enemy_damage = max(1, enemy.attack + random.randint(-3, 3)) # Add some variance
             player_dead = player.take_damage(enemy_damage, display_message) # Pass display_message for logging
             print(f"The {enemy.name} attacks you for {enemy_damage} damage!")
@@ -181,7 +216,7 @@ def dungeon_adventure(player):
     num_encounters = random.randint(3, 7) # Number of rooms/encounters in this dungeon run
     for i in range(num_encounters):
         if player.current_health <= 0:
-            NotRouge_game_core.handle_death(player, display_message)
+            NotRouge_game_core.handle_death(player, display_message, save_file=PROFILES, saver=background_saver())
             return # Exit dungeon if player dies
 
         clear_screen()
@@ -190,23 +225,24 @@ def dungeon_adventure(player):
         print("You explore deeper...")
         time.sleep(1)
 
-        encounter_type = random.choices(["combat", "nothing", "treasure", "healing"], weights=[0.6, 0.2, 0.15, 0.05], k=1)[0]
+        encounter_type = random.choices(NotRouge_game_core.DUNGEON_ENCOUNTER_TYPES, weights=NotRouge_game_core.DUNGEON_ENCOUNTER_WEIGHTS, k=1)[0]
 
         if encounter_type == "combat":
             if not NotRouge_game_core.DUNGEON_ENEMIES:
                 print("No enemies defined in NotRouge_Enemies.txt. Skipping combat.")
                 time.sleep(1)
                 continue # Skip to next encounter if no enemies loaded
-            enemy = random.choice(NotRouge_game_core.DUNGEON_ENEMIES)
-            # Create a copy to ensure changes to health are specific to this encounter
-            current_enemy = NotRouge_game_core.Enemy(enemy.name, enemy.health_full, enemy.attack, enemy.defense, enemy.gold_drop, enemy.exp_drop)
+            # Spawn a fresh encounter so changes to health are specific to this encounter
+            current_enemy = random.choice(NotRouge_game_core.DUNGEON_ENEMIES).spawn()
             combat_result = combat_encounter(player, current_enemy)
             if player.current_health <= 0:
-                NotRouge_game_core.handle_death(player, display_message)
+                NotRouge_game_core.handle_death(player, display_message, save_file=PROFILES, saver=background_saver())
                 return # Player died, return to main loop
+            autosave(player, "combat")
             if not combat_result: # Combat ended without player death or win (e.g., fled, or auto-attack stopped at 1 HP)
                 choice = get_input("Continue exploring the dungeon? (y/n): ", ['y', 'n'])
                 if choice == 'n':
+                    autosave(player, "room")
                     display_message("You retreat from the dungeon.", delay=1.5)
                     display_stats(player) # Updated call
                     return # Player chose to exit dungeon
@@ -219,6 +255,7 @@ def dungeon_adventure(player):
             time.sleep(1)
             choice = get_input("Continue exploring the dungeon? (y/n): ", ['y', 'n'])
             if choice == 'n':
+                autosave(player, "room")
                 display_message("You retreat from the dungeon.", delay=1.5)
                 display_stats(player) # Updated call
                 return
@@ -231,6 +268,7 @@ def dungeon_adventure(player):
             time.sleep(1)
             choice = get_input("Continue exploring the dungeon? (y/n): ", ['y', 'n'])
             if choice == 'n':
+                autosave(player, "room")
                 display_message("You retreat from the dungeon.", delay=1.5)
                 display_stats(player) # Updated call
                 return
@@ -241,10 +279,13 @@ def dungeon_adventure(player):
             time.sleep(1)
             choice = get_input("Continue exploring the dungeon? (y/n): ", ['y', 'n'])
             if choice == 'n':
+                autosave(player, "room")
                 display_message("You retreat from the dungeon.", delay=1.5)
                 display_stats(player) # Updated call
                 return
 
+        autosave(player, "room") # Checkpoint after each room survived
+
     display_message("You have cleared this section of the dungeon! You return to town.", delay=2)
     display_stats(player) # Updated call
     time.sleep(2)
@@ -455,6 +496,11 @@ def throw_away_item_menu(player):
 def town_menu(player):
     """Displays the town menu options."""
     while True:
+        if AUTOSAVE:
+            AUTOSAVE.flush() # Write any checkpoint held back in the dungeon
+        # Pick up edits to the content files (or the content pack) since the last visit
+        if NotRouge_game_core.reload_changed_content(print):
+            time.sleep(1.5)
         clear_screen()
         print(f"--- Welcome to {player.name}'s Town ---")
         display_stats(player) # Updated call
@@ -483,13 +529,29 @@ def town_menu(player):
         elif choice == '3':
             inventory_menu(player)
         elif choice == '4':
-            NotRouge_game_core.save_game(player, SAVE_FILE, display_message) # Pass SAVE_FILE and display_message
+            save_player(player) # Saved under the hero's name
         elif choice == '5':
-            NotRouge_game_core.save_game(player, SAVE_FILE, display_message) # Always save before exiting
+            save_player(player) # Always save before exiting
             display_message("Thanks for playing! Goodbye.", delay=2)
             return False # Exit game loop
     return True # Stay in town menu
 
+def choose_profile():
+    """Lists the saved heroes and loads the one the player picks (None if there are none)."""
+    if background_saver():
+        background_saver().flush() # Make sure a save still being written is listed
+    PROFILES.import_save_file(NotRouge_game_core.SAVE_FILE, display_message) # Bring over a save from older versions
+    profiles = PROFILES.list_profiles()
+    if not profiles:
+        return None
+    clear_screen()
+    print("--- Saved Heroes ---")
+    for i, (name, level, gold) in enumerate(profiles):
+        print(f"{i + 1}. {name} (Level {level}, {gold} gold)")
+    choices = [str(i + 1) for i in range(len(profiles))]
+    choice = get_input(f"Choose a hero (1-{len(profiles)}): ", choices)
+    return NotRouge_game_core.load_game(PROFILES, display_message, profiles[int(choice) - 1][0])
+
 def main_menu():
     """Displays the main game menu."""
     while True:
@@ -503,11 +565,16 @@ def main_menu():
 
         if choice == '1':
             player_name = get_input("Enter your hero's name: ")
+            if PROFILES is not None and player_name in PROFILES: # Saving would replace that hero's profile
+                print(f"A hero named {player_name} already has a saved game. Starting over will overwrite it.")
+                if get_input("Overwrite that saved game? (y/n): ", ['y', 'n']) == 'n':
+                    display_message("New game cancelled.", delay=1.5)
+                    continue
             player = NotRouge_game_core.Player(player_name) # Use Player from NotRouge_game_core
             display_message(f"Welcome, {player.name}!", delay=1.5)
             town_menu(player)
         elif choice == '2':
-            player = NotRouge_game_core.load_game(SAVE_FILE, display_message) # Pass SAVE_FILE and display_message
+            player = choose_profile()
             if player:
                 town_menu(player)
             else:
@@ -517,4 +584,11 @@ def main_menu():
             break
 
 if __name__ == "__main__":
+    PROFILES = NotRouge_game_core.ProfileStore() # NotRouge_game_core.PROFILE_DB
+    AUTOSAVE = NotRouge_game_core.AutosaveScheduler(PROFILES, log_function=display_message)
+    if len(sys.argv) > 1: # Optional content pack directory layered over the default content
+        NotRouge_game_core.load_content_pack(NotRouge_game_core.ContentPack.from_directory(sys.argv[1]))
+    else:
+        NotRouge_game_core.load_content() # Load items and enemies up front (prints [CORE_INIT] messages)
     main_menu()
+    AUTOSAVE.saver.close() # Finish any autosave still being written
@@ -1,7 +1,19 @@
 import os
 import json
+import mmap
+import shutil
+import sqlite3
+import struct
+import hashlib
+import zlib
 import random
 import math
+import time
+import threading
+import bisect
+import functools
+from fractions import Fraction
+from collections import namedtuple
 
 # --- Game Constants ---
 # These are core game constants, not UI specific
@@ -9,20 +21,296 @@ STARTING_GOLD = 100
 STARTING_HEALTH = 100
 STARTING_ATTACK = 10
 STARTING_DEFENSE = 5
+SAVE_FILE = "NotRouge_save.json" # Single-player save file (older versions saved only here)
+PROFILE_DB = "NotRouge_profiles.db" # Save store holding every named profile
 BASE_EXP_TO_LEVEL = 100
 EXP_PER_LEVEL_MULTIPLIER = 1.5
 SELL_PRICE_MULTIPLIER = 0.5 # Items sell for half their cost
+HEALTH_PER_LEVEL = 15
+ATTACK_PER_LEVEL = 3
+DEFENSE_PER_LEVEL = 2
 
 # --- Helper Functions (Core Logic) ---
 
+class LevelCurve:
+    """Precomputed EXP curve with a bisect-based level resolver.
+
+    cumulative[k] is the total experience needed to go from level 1 to level
+    k + 1, so any experience total maps to a level in O(log n). The table
+    grows on demand for very high levels.
+    """
+    def __init__(self, base=BASE_EXP_TO_LEVEL, multiplier=EXP_PER_LEVEL_MULTIPLIER, precompute=200):
+        self.base = base
+        self.multiplier = multiplier
+        self.requirements = [] # requirements[level - 1]: experience needed to leave that level
+        self.cumulative = [0]
+        self._extend_to(precompute)
+
+    def _requirement(self, level):
+        try:
+            return math.ceil(self.base * (self.multiplier ** (level - 1)))
+        except OverflowError: # Past float range (level ~1750): continue with exact arithmetic
+            return math.ceil(self.base * Fraction(self.multiplier) ** (level - 1))
+
+    def _extend_to(self, level):
+        """Makes sure the table covers levels up to and including level."""
+        requirements = self.requirements
+        cumulative = self.cumulative
+        while len(requirements) < level:
+            requirement = self._requirement(len(requirements) + 1)
+            requirements.append(requirement)
+            cumulative.append(cumulative[-1] + requirement)
+
+    def exp_to_next(self, level):
+        """Experience needed to go from level to level + 1."""
+        if level > len(self.requirements):
+            self._extend_to(level)
+        return self.requirements[level - 1]
+
+    def total_exp(self, level, experience=0):
+        """Total experience earned since level 1 for a level/experience pair."""
+        if level > len(self.requirements):
+            self._extend_to(level)
+        return self.cumulative[level - 1] + experience
+
+    def resolve(self, level, experience):
+        """Normalizes a level plus (possibly overflowing) experience to (new_level, leftover)."""
+        total = self.total_exp(level, experience)
+        while self.cumulative[-1] <= total:
+            self._extend_to(max(1, len(self.requirements) * 2))
+        new_level = bisect.bisect_right(self.cumulative, total)
+        return new_level, total - self.cumulative[new_level - 1]
+
+    def progress(self, level, experience):
+        """Fraction (0..1) of the way from level to the next, e.g. for progress bars."""
+        return experience / self.exp_to_next(level)
+
+LEVEL_CURVE = LevelCurve()
+
 def calculate_level_up_exp(level):
     """Calculates the experience needed for the next level."""
-    return math.ceil(BASE_EXP_TO_LEVEL * (EXP_PER_LEVEL_MULTIPLIER ** (level - 1)))
+    return LEVEL_CURVE.exp_to_next(level)
+
+# --- Game Events ---
+# Core methods report what happened as small typed events instead of
+# pre-formatted text. Text is only built when a sink actually displays it,
+# and a falsy sink (None or NULL_SINK) skips creating events at all.
+
+class GameEvent:
+    """Base class for structured game events."""
+    __slots__ = ()
+    category = "general" # Broad grouping for UI filtering: general, combat, loot, level, item, death, system
+
+    def lines(self):
+        """Returns the display text of this event as a tuple of log lines."""
+        return (self.message(),)
+
+    def message(self):
+        return "\n".join(self.lines())
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+class Message(GameEvent):
+    """Free-form text (system notices, UI messages)."""
+    __slots__ = ("text", "category")
+    def __init__(self, text, category="general"):
+        self.text = text
+        self.category = category
+    def message(self):
+        return self.text
+
+class ExpGained(GameEvent):
+    __slots__ = ("amount",)
+    category = "level"
+    def __init__(self, amount):
+        self.amount = amount
+    def message(self):
+        return f"You gained {self.amount} experience!"
+
+class LevelUp(GameEvent):
+    __slots__ = ("level", "levels")
+    category = "level"
+    def __init__(self, level, levels=1):
+        self.level = level # Level reached
+        self.levels = levels # Levels gained at once
+    def lines(self):
+        if self.levels == 1:
+            headline = f"\n*** You leveled up to Level {self.level}! ***"
+        else:
+            headline = f"\n*** You leveled up {self.levels} times to Level {self.level}! ***"
+        return (headline,
+                f"Health +{HEALTH_PER_LEVEL * self.levels}, Attack +{ATTACK_PER_LEVEL * self.levels}, "
+                f"Defense +{DEFENSE_PER_LEVEL * self.levels}.",
+                "You feel stronger!")
+
+class DamageTaken(GameEvent):
+    """The player took damage."""
+    __slots__ = ("amount",)
+    category = "combat"
+    def __init__(self, amount):
+        self.amount = amount
+    def message(self):
+        return f"You took {self.amount} damage!"
+
+class DamageDealt(GameEvent):
+    """An enemy took damage."""
+    __slots__ = ("enemy", "amount")
+    category = "combat"
+    def __init__(self, enemy, amount):
+        self.enemy = enemy # Enemy name
+        self.amount = amount
+    def message(self):
+        return f"The {self.enemy} took {self.amount} damage!"
+
+class EnemyDefeated(GameEvent):
+    __slots__ = ("enemy", "gold", "exp")
+    category = "combat"
+    def __init__(self, enemy, gold, exp):
+        self.enemy = enemy # Enemy name
+        self.gold = gold
+        self.exp = exp
+    def message(self):
+        return f"You defeated the {self.enemy}!"
+
+class Healed(GameEvent):
+    __slots__ = ("amount", "current_health", "max_health")
+    category = "combat"
+    def __init__(self, amount, current_health, max_health):
+        self.amount = amount
+        self.current_health = current_health
+        self.max_health = max_health
+    def message(self):
+        return f"You healed {self.amount} health. Current health: {self.current_health}/{self.max_health}"
+
+class ItemEquipped(GameEvent):
+    __slots__ = ("item",)
+    category = "item"
+    def __init__(self, item):
+        self.item = item # Item name
+    def message(self):
+        return f"Equipped {self.item}."
+
+class ItemUnequipped(GameEvent):
+    __slots__ = ("item",)
+    category = "item"
+    def __init__(self, item):
+        self.item = item # Item name
+    def message(self):
+        return f"Unequipped {self.item}."
+
+class CannotEquip(GameEvent):
+    __slots__ = ("item",)
+    category = "item"
+    def __init__(self, item):
+        self.item = item # Item name
+    def message(self):
+        return f"Cannot equip {self.item}. It's not a recognized equipment type."
+
+class ItemBought(GameEvent):
+    __slots__ = ("item", "cost")
+    category = "loot"
+    def __init__(self, item, cost):
+        self.item = item # Item name
+        self.cost = cost
+    def message(self):
+        return f"You bought {self.item} for {self.cost} gold!"
+
+class ItemSold(GameEvent):
+    __slots__ = ("item", "price")
+    category = "loot"
+    def __init__(self, item, price):
+        self.item = item # Item name
+        self.price = price
+    def message(self):
+        return f"You sold {self.item} for {self.price} gold!"
+
+class PlayerDefeated(GameEvent):
+    __slots__ = ()
+    category = "death"
+    def lines(self):
+        return ("You have been defeated!", "But your adventure doesn't end here...")
+
+class DeathPenalty(GameEvent):
+    """The persistence rules applied by handle_death."""
+    __slots__ = ("gold", "kept_item", "level")
+    category = "death"
+    def __init__(self, gold, kept_item, level):
+        self.gold = gold
+        self.kept_item = kept_item # Item name, or None
+        self.level = level
+    def lines(self):
+        if self.kept_item:
+            kept = f"You managed to keep one random piece of equipment: {self.kept_item}."
+        else:
+            kept = "You had no equipment to keep."
+        return (f"You kept half your gold: {self.gold} gold remaining.", kept,
+                f"You kept half your gained levels. You are now Level {self.level}.")
+
+class EventSink:
+    """Receives structured events; subclass and override handle().
+
+    Sinks can be passed anywhere a log_function is expected. Calling a sink
+    with plain text (as UI code does) wraps it in a Message event.
+    """
+    def handle(self, event):
+        pass
+
+    def __call__(self, message):
+        self.handle(Message(message))
+
+class NullSink(EventSink):
+    """Discards everything. It is falsy, so core code skips building events for it."""
+    def __bool__(self):
+        return False
+
+    def __call__(self, message):
+        pass
+
+NULL_SINK = NullSink()
+
+class TextSink(EventSink):
+    """Formats events to text, one line at a time, for a log_function(str) callback."""
+    def __init__(self, log_function):
+        self.log_function = log_function
+
+    def handle(self, event):
+        for line in event.lines():
+            self.log_function(line)
+
+class EventRecorder(EventSink):
+    """Keeps every event it receives in a list (useful for tests and replays)."""
+    def __init__(self):
+        self.events = []
+
+    def handle(self, event):
+        self.events.append(event)
+
+def emit(log_function, event):
+    """Delivers an event to an EventSink, or as text lines to a plain log_function(str).
+
+    Falsy targets (None, NULL_SINK) are ignored; hot paths should test the
+    target themselves before building the event.
+    """
+    if not log_function:
+        return
+    if isinstance(log_function, EventSink):
+        log_function.handle(event)
+    else:
+        for line in event.lines():
+            log_function(line)
 
 # --- Game Classes ---
 
 class Player:
     """Represents the player character."""
+    __slots__ = ("name", "level", "experience", "max_health", "current_health", "attack", "defense",
+                 "gold", "inventory", "equipped", "saved_state")
+    # Fields written to save files, in save_state() order
+    SAVED_FIELDS = ("name", "level", "experience", "max_health", "current_health", "attack", "defense",
+                    "gold", "inventory", "equipped")
+
     def __init__(self, name="Hero"):
         self.name = name
         self.level = 1
@@ -38,31 +326,58 @@ class Player:
             "armor": None,
             "accessory": None
         }
+        self.saved_state = None # save_state() as of the last save; None if never saved
+
+    # --- Dirty Tracking ---
+    # Rather than hooking every assignment, the saved fields are compared with
+    # a cheap snapshot taken at the last save. Items are never modified after
+    # creation, so inventory and equipment compare by item identity.
+
+    def save_state(self):
+        """The saved fields as a tuple that later changes don't affect."""
+        return (self.name, self.level, self.experience, self.max_health, self.current_health, self.attack,
+                self.defense, self.gold, tuple(self.inventory), tuple(self.equipped.items()))
+
+    def changed_fields(self, state=None):
+        """Names of saved fields that differ from state (default: the last save)."""
+        if state is None:
+            state = self.saved_state
+        if state is None:
+            return list(self.SAVED_FIELDS)
+        return [field for field, old, new in zip(self.SAVED_FIELDS, state, self.save_state()) if old != new]
+
+    def is_dirty(self):
+        """True if anything saved has changed since the last save."""
+        return self.saved_state is None or self.saved_state != self.save_state()
+
+    def mark_saved(self, state=None):
+        """Records the current state (or a given save_state()) as saved."""
+        self.saved_state = self.save_state() if state is None else state
 
     def gain_exp(self, exp_gained, log_function):
         """Adds experience to the player and handles level ups."""
-        log_function(f"You gained {exp_gained} experience!")
-        self.experience += exp_gained
-        while self.experience >= calculate_level_up_exp(self.level):
-            self.experience -= calculate_level_up_exp(self.level)
-            self.level_up(log_function)
-
-    def level_up(self, log_function):
-        """Increases player stats upon leveling up."""
-        self.level += 1
-        self.max_health += 15
+        if log_function:
+            emit(log_function, ExpGained(exp_gained))
+        new_level, self.experience = LEVEL_CURVE.resolve(self.level, self.experience + exp_gained)
+        if new_level > self.level:
+            self.level_up(log_function, new_level - self.level)
+
+    def level_up(self, log_function, levels=1):
+        """Increases player stats upon leveling up (possibly several levels at once)."""
+        self.level += levels
+        self.max_health += HEALTH_PER_LEVEL * levels
         self.current_health = self.max_health # Fully heal on level up
-        self.attack += 3
-        self.defense += 2
-        log_function(f"\n*** You leveled up to Level {self.level}! ***")
-        log_function("Health +15, Attack +3, Defense +2.")
-        log_function("You feel stronger!")
+        self.attack += ATTACK_PER_LEVEL * levels
+        self.defense += DEFENSE_PER_LEVEL * levels
+        if log_function:
+            emit(log_function, LevelUp(self.level, levels))
 
     def take_damage(self, damage, log_function):
         """Reduces player health based on damage taken and defense."""
         effective_damage = max(0, damage - self.defense)
         self.current_health -= effective_damage
-        log_function(f"You took {effective_damage} damage!")
+        if log_function:
+            emit(log_function, DamageTaken(effective_damage))
         if self.current_health <= 0:
             self.current_health = 0
             return True # Player is dead
@@ -73,7 +388,8 @@ class Player:
         old_health = self.current_health
         self.current_health = min(self.max_health, self.current_health + amount)
         healed_amount = self.current_health - old_health
-        log_function(f"You healed {healed_amount} health. Current health: {self.current_health}/{self.max_health}")
+        if log_function:
+            emit(log_function, Healed(healed_amount, self.current_health, self.max_health))
 
     def equip_item(self, item, log_function):
         """Equips an item, un-equipping previous item if necessary."""
@@ -86,7 +402,7 @@ class Player:
                 self.max_health -= old_item.health_bonus
                 self.current_health = min(self.current_health, self.max_health) # Adjust current health if max decreased
                 self.inventory.append(old_item) # Move old item back to inventory
-                log_function(f"Unequipped {old_item.name}.")
+                emit(log_function, ItemUnequipped(old_item.name))
 
             # Equip new item
             self.equipped[item.item_type] = item
@@ -95,12 +411,36 @@ class Player:
             self.max_health += item.health_bonus
             self.current_health = min(self.current_health, self.max_health) # Ensure current health doesn't exceed new max
             self.inventory.remove(item)
-            log_function(f"Equipped {item.name}.")
+            emit(log_function, ItemEquipped(item.name))
         else:
-            log_function(f"Cannot equip {item.name}. It's not a recognized equipment type.")
+            emit(log_function, CannotEquip(item.name))
+
+def create_player_at_level(level, name="Hero"):
+    """Creates an unequipped player with the base stats of the given level."""
+    player = Player(name)
+    player.level = level
+    player.max_health = STARTING_HEALTH + HEALTH_PER_LEVEL * (level - 1)
+    player.current_health = player.max_health
+    player.attack = STARTING_ATTACK + ATTACK_PER_LEVEL * (level - 1)
+    player.defense = STARTING_DEFENSE + DEFENSE_PER_LEVEL * (level - 1)
+    return player
+
+def snapshot_player(player):
+    """A copy of the player that later changes to the original don't affect.
+
+    Items are shared: nothing changes an Item after it is created.
+    """
+    snapshot = Player.__new__(Player)
+    for field in Player.__slots__:
+        setattr(snapshot, field, getattr(player, field))
+    snapshot.inventory = list(player.inventory)
+    snapshot.equipped = dict(player.equipped)
+    return snapshot
 
 class Item:
     """Represents an item in the game."""
+    __slots__ = ("name", "item_type", "cost", "attack_bonus", "defense_bonus", "health_bonus", "heal_amount")
+
     def __init__(self, name, item_type, cost, attack_bonus=0, defense_bonus=0, health_bonus=0, heal_amount=0):
         self.name = name
         self.item_type = item_type # e.g., "weapon", "armor", "accessory", "consumable"
@@ -135,150 +475,1739 @@ class Item:
             heal_amount=data.get("heal_amount", 0)
         )
 
+class EnemyTemplate:
+    """Immutable enemy stats, shared by every encounter with that enemy."""
+    __slots__ = ("name", "health_full", "attack", "defense", "gold_drop", "exp_drop")
+
+    def __init__(self, name, health, attack, defense, gold_drop, exp_drop):
+        set_field = object.__setattr__
+        set_field(self, "name", name)
+        set_field(self, "health_full", health)
+        set_field(self, "attack", attack)
+        set_field(self, "defense", defense)
+        set_field(self, "gold_drop", gold_drop)
+        set_field(self, "exp_drop", exp_drop)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"EnemyTemplate is immutable (tried to set {name!r})")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"EnemyTemplate is immutable (tried to delete {name!r})")
+
+    def __reduce__(self):
+        return (EnemyTemplate, (self.name, self.health_full, self.attack, self.defense, self.gold_drop, self.exp_drop))
+
+    @property
+    def health(self):
+        """Full health; templates never take damage."""
+        return self.health_full
+
+    def spawn(self):
+        """Creates a fresh Enemy for one encounter."""
+        return Enemy.from_template(self)
+
 class Enemy:
-    """Represents an enemy character."""
+    """Represents an enemy in an encounter: a shared EnemyTemplate plus current health."""
+    __slots__ = ("template", "health")
+
     def __init__(self, name, health, attack, defense, gold_drop, exp_drop):
-        self.name = name
+        self.template = EnemyTemplate(name, health, attack, defense, gold_drop, exp_drop)
         self.health = health
-        self.attack = attack
-        self.defense = defense
-        self.gold_drop = gold_drop
-        self.exp_drop = exp_drop
-        self.health_full = health # Store original health for combat display
+
+    @classmethod
+    def from_template(cls, template):
+        """Creates an Enemy at full health that shares the template's stats."""
+        enemy = cls.__new__(cls)
+        enemy.template = template
+        enemy.health = template.health_full
+        return enemy
+
+    name = property(lambda self: self.template.name)
+    health_full = property(lambda self: self.template.health_full) # Original health for combat display
+    attack = property(lambda self: self.template.attack)
+    defense = property(lambda self: self.template.defense)
+    gold_drop = property(lambda self: self.template.gold_drop)
+    exp_drop = property(lambda self: self.template.exp_drop)
 
     def take_damage(self, damage, log_function):
         """Reduces enemy health based on damage taken and defense."""
-        effective_damage = max(0, damage - self.defense)
+        template = self.template
+        effective_damage = max(0, damage - template.defense)
         self.health -= effective_damage
-        log_function(f"The {self.name} took {effective_damage} damage!")
+        if log_function:
+            emit(log_function, DamageDealt(template.name, effective_damage))
         if self.health <= 0:
             self.health = 0
             return True # Enemy is dead
         return False # Enemy is still alive
 
+# --- Shop Transactions ---
+
+def sell_price(item):
+    """Gold received when selling an item."""
+    return math.floor(item.cost * SELL_PRICE_MULTIPLIER)
+
+def buy_item(player, item, log_function):
+    """Buys a fresh copy of a shop item. Returns the new Item, or None if the player can't afford it."""
+    if player.gold < item.cost:
+        emit(log_function, Message("You don't have enough gold!", "loot"))
+        return None
+    player.gold -= item.cost
+    bought = Item(item.name, item.item_type, item.cost, item.attack_bonus, item.defense_bonus,
+                  item.health_bonus, item.heal_amount)
+    player.inventory.append(bought)
+    emit(log_function, ItemBought(item.name, item.cost))
+    return bought
+
+def sell_item(player, item, log_function):
+    """Sells an (unequipped) inventory item. Returns the gold received."""
+    price = sell_price(item)
+    player.gold += price
+    player.inventory.remove(item)
+    emit(log_function, ItemSold(item.name, price))
+    return price
+
+# --- Exact Fight Solver ---
+
+FightOutcome = namedtuple("FightOutcome", [
+    "win_probability", # Chance the enemy dies first
+    "loss_probability", # Chance the player dies first
+    "turn_distribution", # Tuple of (turn, win probability, loss probability) per turn
+    "expected_hp_left", # Expected player HP after the fight (0 on a loss)
+])
+
+def _damage_distribution(attack, variance, defense):
+    """Exact distribution of effective damage as a tuple of (damage, probability)."""
+    rolls = 2 * variance + 1
+    counts = {}
+    for roll in range(-variance, variance + 1):
+        damage = max(0, max(1, attack + roll) - defense)
+        counts[damage] = counts.get(damage, 0) + 1
+    return tuple((damage, count / rolls) for damage, count in counts.items())
+
+def _advance_health(health_distribution, hits):
+    """Applies one hit to a {health: probability} map; returns (survivors, killed probability)."""
+    survivors = {}
+    killed = 0.0
+    for health, probability in health_distribution.items():
+        for damage, chance in hits:
+            if health - damage <= 0:
+                killed += probability * chance
+            else:
+                survivors[health - damage] = survivors.get(health - damage, 0.0) + probability * chance
+    return survivors, killed
+
+@functools.lru_cache(maxsize=65536)
+def solve_fight(player_attack, player_defense, player_health, enemy_health, enemy_attack, enemy_defense,
+                max_turns=10000, tolerance=1e-12):
+    """Computes the exact outcome distribution of a fight (player strikes first).
+
+    Damage dealt and damage taken don't depend on current HP, so the two
+    health tracks evolve independently and only need to be combined per
+    turn: the player wins on turn t if the enemy dies to the t-th hit while
+    the player survived t-1 hits, and loses if the enemy survives t hits
+    while the t-th enemy hit is fatal. Rolls match combat (randint(-5, 5)
+    for the player, randint(-3, 3) for the enemy). Stops once less than
+    tolerance of the probability mass is still fighting; anything left
+    after max_turns is in neither win_probability nor loss_probability.
+    """
+    player_hits = _damage_distribution(player_attack, 5, enemy_defense)
+    enemy_hits = _damage_distribution(enemy_attack, 3, player_defense)
+    if player_hits == ((0, 1.0),) and enemy_hits == ((0, 1.0),):
+        return FightOutcome(0.0, 0.0, (), 0.0) # Nobody can ever get hurt
+
+    win_probability = 0.0
+    loss_probability = 0.0
+    expected_hp_left = 0.0
+    turn_distribution = []
+    enemy_track = {enemy_health: 1.0}
+    player_track = {player_health: 1.0}
+    enemy_alive = 1.0 # P(enemy survived t-1 player hits)
+    player_alive = 1.0 # P(player survived t-1 enemy hits)
+    for turn in range(1, max_turns + 1):
+        enemy_track, enemy_killed = _advance_health(enemy_track, player_hits)
+        turn_win = enemy_killed * player_alive
+        if turn_win:
+            expected_hp_left += enemy_killed * sum(health * probability for health, probability in player_track.items())
+        enemy_alive -= enemy_killed
+
+        player_track, player_killed = _advance_health(player_track, enemy_hits)
+        turn_loss = enemy_alive * player_killed
+        player_alive -= player_killed
+
+        win_probability += turn_win
+        loss_probability += turn_loss
+        if turn_win or turn_loss:
+            turn_distribution.append((turn, turn_win, turn_loss))
+        if enemy_alive * player_alive < tolerance:
+            break
+    return FightOutcome(win_probability, loss_probability, tuple(turn_distribution), expected_hp_left)
+
+def solve_fight_for(player, enemy):
+    """Exact fight outcome for a player (at current health) against a fresh copy of an enemy."""
+    return solve_fight(player.attack, player.defense, player.current_health,
+                       enemy.health_full, enemy.attack, enemy.defense)
+
+# --- Combat Engine (UI-free) ---
+
+def roll_player_damage(player, rng=random):
+    """Rolls the raw damage of a player attack (before enemy defense)."""
+    return max(1, player.attack + rng.randint(-5, 5)) # Add some variance
+
+def roll_enemy_damage(enemy, rng=random):
+    """Rolls the raw damage of an enemy attack (before player defense)."""
+    return max(1, enemy.attack + rng.randint(-3, 3)) # Add some variance
+
+def award_victory(player, enemy, log_function):
+    """Gives the player the defeated enemy's gold and experience."""
+    if log_function:
+        emit(log_function, EnemyDefeated(enemy.name, enemy.gold_drop, enemy.exp_drop))
+    player.gold += enemy.gold_drop
+    player.gain_exp(enemy.exp_drop, log_function)
+
+MAX_COMBAT_TURNS = 10000 # Turns after which a fight nobody can win (e.g. zero damage both ways) is a draw
+
+class CombatResult:
+    """Summary of a fight resolved by resolve_combat."""
+    def __init__(self, won, turns, damage_dealt, damage_taken, draw=False):
+        self.won = won # True if the enemy died, False if the player died (or on a draw)
+        self.draw = draw # True if both were still standing after max_turns
+        self.turns = turns # Number of player attacks made
+        self.damage_dealt = damage_dealt # Effective damage dealt to the enemy
+        self.damage_taken = damage_taken # Effective damage taken by the player
+
+def resolve_combat(player, enemy, log_function=NULL_SINK, rng=random, award=True, max_turns=MAX_COMBAT_TURNS):
+    """Resolves a whole fight (player strikes first) with no delays or UI.
+
+    Uses the same damage rules as the CLI and GUI combat loops. On a win the
+    enemy's gold and experience are awarded unless award is False. A fight
+    still going after max_turns ends as a draw.
+    """
+    damage_dealt = 0
+    damage_taken = 0
+    for turns in range(1, max_turns + 1):
+        enemy_health = enemy.health
+        enemy_dead = enemy.take_damage(roll_player_damage(player, rng), log_function)
+        damage_dealt += enemy_health - enemy.health
+        if enemy_dead:
+            if award:
+                award_victory(player, enemy, log_function)
+            return CombatResult(True, turns, damage_dealt, damage_taken)
+
+        player_health = player.current_health
+        player_dead = player.take_damage(roll_enemy_damage(enemy, rng), log_function)
+        damage_taken += player_health - player.current_health
+        if player_dead:
+            return CombatResult(False, turns, damage_dealt, damage_taken)
+    return CombatResult(False, max_turns, damage_dealt, damage_taken, draw=True)
+
+CONDENSED_LOG_TURNS = 50 # Turns spelled out in a condensed auto-attack log; longer fights are summarised
+
+class AutoCombatResult(CombatResult):
+    """Summary of an auto-attack resolved by resolve_auto_combat."""
+    def __init__(self, outcome, turns, damage_dealt, damage_taken, gold, exp, log=None):
+        super().__init__(outcome == "won", turns, damage_dealt, damage_taken)
+        self.outcome = outcome # "won", "died", "stopped" (at 1 HP) or "stalemate" (max_turns with nobody winning)
+        self.gold = gold # Gold awarded (0 unless won)
+        self.exp = exp # Experience awarded (0 unless won)
+        self.log = log # Tuple of condensed log lines (one per turn), or None if not asked for
+
+    def summary(self, enemy_name):
+        """One line describing the fight."""
+        turns = f"{self.turns} turn{'s' if self.turns != 1 else ''}"
+        if self.outcome == "won":
+            result = f"You defeated the {enemy_name} in {turns}"
+        elif self.outcome == "died":
+            result = f"The {enemy_name} defeated you after {turns}"
+        elif self.outcome == "stalemate":
+            result = f"Stalemate with the {enemy_name} after {turns}"
+        else:
+            result = f"Auto-attack stopped at 1 HP after {turns}"
+        summary = f"{result}: dealt {self.damage_dealt} damage, took {self.damage_taken}."
+        if self.won:
+            summary += f" Gained {self.gold} gold and {self.exp} experience."
+        return summary
+
+def _condensed(log, turns):
+    """The condensed log as a tuple, with a line standing in for the turns left out."""
+    if log is None:
+        return None
+    skipped = turns - len(log)
+    if skipped > 0:
+        log.insert(CONDENSED_LOG_TURNS, f"... {skipped} more turns ...")
+    return tuple(log)
+
+def resolve_auto_combat(player, enemy, log_function=NULL_SINK, rng=random, condensed_log=False,
+                        max_turns=MAX_COMBAT_TURNS):
+    """Plays a whole auto-attack in one call, with no delays: the instant version of the UIs' auto-attack.
+
+    Same rules as the turn-by-turn auto-attack: the player strikes first,
+    and auto-attack stops at the start of a turn once the player is down to
+    1 HP (a hit can still kill from above that). After max_turns with both
+    still standing (e.g. neither can get through the other's defense) it
+    gives up with a "stalemate" and leaves the fight to the player. Per-hit
+    events are not emitted; on a win the enemy's gold and experience are
+    awarded through log_function. With condensed_log, result.log holds one
+    line per turn (the first CONDENSED_LOG_TURNS turns, then a count).
+    """
+    turns = 0
+    damage_dealt = 0
+    damage_taken = 0
+    log = [] if condensed_log else None
+    while True:
+        if player.current_health <= 1:
+            outcome = "stopped"
+            break
+        if turns >= max_turns:
+            outcome = "stalemate"
+            break
+        turns += 1
+        enemy_health = enemy.health
+        enemy_dead = enemy.take_damage(roll_player_damage(player, rng), NULL_SINK)
+        dealt = enemy_health - enemy.health
+        damage_dealt += dealt
+        if enemy_dead:
+            if log is not None:
+                log.append(f"Turn {turns}: you hit for {dealt}; the {enemy.name} falls.")
+            award_victory(player, enemy, log_function)
+            return AutoCombatResult("won", turns, damage_dealt, damage_taken, enemy.gold_drop, enemy.exp_drop,
+                                    _condensed(log, turns))
+
+        player_health = player.current_health
+        player_dead = player.take_damage(roll_enemy_damage(enemy, rng), NULL_SINK)
+        taken = player_health - player.current_health
+        damage_taken += taken
+        if log is not None and (turns <= CONDENSED_LOG_TURNS or player_dead):
+            log.append(f"Turn {turns}: you hit for {dealt}, took {taken} "
+                       f"(HP {player.current_health}/{player.max_health} vs {enemy.health}/{enemy.health_full}).")
+        if player_dead:
+            outcome = "died"
+            break
+    return AutoCombatResult(outcome, turns, damage_dealt, damage_taken, 0, 0, _condensed(log, turns))
+
+def simulate_fight_stats(player_health, player_attack, player_defense,
+                         enemy_health, enemy_attack, enemy_defense, rng=random, max_turns=MAX_COMBAT_TURNS):
+    """Fast integer-only fight resolution for batch simulation.
+
+    Returns (won, turns, damage_taken, draw). Fights still going after
+    max_turns (e.g. neither side can get through the other's defense) are
+    draws, not losses, like in resolve_combat.
+    """
+    random_float = rng.random
+    damage_taken = 0
+    for turn in range(1, max_turns + 1):
+        # int(random() * 11) - 5 is a uniform roll in -5..5, like randint(-5, 5)
+        raw = player_attack + int(random_float() * 11) - 5
+        enemy_health -= max(0, (raw if raw > 1 else 1) - enemy_defense)
+        if enemy_health <= 0:
+            return True, turn, damage_taken, False
+        raw = enemy_attack + int(random_float() * 7) - 3
+        hit = max(0, (raw if raw > 1 else 1) - player_defense)
+        damage_taken += hit
+        player_health -= hit
+        if player_health <= 0:
+            return False, turn, damage_taken + player_health, False
+    return False, max_turns, damage_taken, True
+
+# --- Bot Policies ---
+
+COMBAT_ACTIONS = ("attack", "use_item", "flee", "auto_attack")
+
+class GamePolicy:
+    """Decides what an automated player does; override any of the hooks.
+
+    The defaults fight every battle with auto-attack, always keep exploring
+    and never shop, which matches the plain run_dungeon behaviour.
+    """
+    def combat_action(self, player, enemy):
+        """Returns one of COMBAT_ACTIONS."""
+        return "auto_attack"
+
+    def choose_consumable(self, player, enemy, consumables):
+        """Picks a consumable to use in combat, or None."""
+        return consumables[0] if consumables else None
+
+    def continue_dungeon(self, player, room, rooms):
+        """After a room without a won fight: True keeps exploring, False retreats to town."""
+        return True
+
+    def shop(self, player, offered_items):
+        """Returns the offered items to buy, in order."""
+        return []
+
+    def manage_inventory(self, player):
+        """Returns town actions to run in order: ("equip" | "use" | "sell", item)."""
+        return []
+
+class AutoAttackPolicy(GamePolicy):
+    """Auto-attacks everything and never visits the shop."""
+    pass
+
+def _item_score(item):
+    """Rough worth of a piece of gear (health bonus counts at a fifth)."""
+    return item.attack_bonus + item.defense_bonus + item.health_bonus / 5
+
+@functools.lru_cache(maxsize=4096)
+def _damage_moments(attack, variance, defense):
+    """Mean and variance of the effective damage of one hit."""
+    hits = _damage_distribution(attack, variance, defense)
+    mean = sum(damage * chance for damage, chance in hits)
+    return mean, sum((damage - mean) ** 2 * chance for damage, chance in hits)
+
+def _hits_needed(health, mean, variance):
+    """Normal approximation (mean, variance) of the number of hits needed to deal health damage."""
+    return health / mean, health * variance / mean ** 3
+
+def estimate_win_probability(player_attack, player_defense, player_health, enemy_health, enemy_attack, enemy_defense):
+    """Cheap normal approximation of solve_fight's win probability.
+
+    Compares the number of hits each side needs to finish the other; good
+    enough to tell clear wins and losses apart, not for close fights.
+    """
+    dealt, dealt_variance = _damage_moments(player_attack, 5, enemy_defense)
+    taken, taken_variance = _damage_moments(enemy_attack, 3, player_defense)
+    if not dealt:
+        return 0.0
+    if not taken:
+        return 1.0
+    to_kill, kill_variance = _hits_needed(enemy_health, dealt, dealt_variance)
+    to_die, die_variance = _hits_needed(player_health, taken, taken_variance)
+    # The player strikes first, so reaching the kill half a hit later still wins
+    margin = to_die - to_kill + 0.5
+    spread = math.sqrt(kill_variance + die_variance + 1 / 6) # + variance of rounding to whole hits
+    return 0.5 * (1 + math.erf(margin / (spread * math.sqrt(2))))
+
+class CautiousPolicy(GamePolicy):
+    """Buys gear upgrades and potions, heals when low, flees from fights it
+    probably loses and retreats when hurt.
+
+    Fights are judged by estimate_win_probability first; only those within
+    uncertain of flee_below go to the exact fight solver, since the player's
+    current health differs between encounters and an exact solve rarely
+    hits its cache.
+    """
+    def __init__(self, heal_below=0.4, retreat_below=0.3, flee_below=0.5, uncertain=0.2):
+        self.heal_below = heal_below
+        self.retreat_below = retreat_below
+        self.flee_below = flee_below
+        self.uncertain = uncertain
+
+    def _should_flee(self, player, enemy):
+        stats = (player.attack, player.defense, player.current_health, enemy.health, enemy.attack, enemy.defense)
+        estimate = estimate_win_probability(*stats)
+        if abs(estimate - self.flee_below) >= self.uncertain:
+            return estimate < self.flee_below
+        return solve_fight(*stats).win_probability < self.flee_below
+
+    def combat_action(self, player, enemy):
+        if player.current_health < player.max_health * self.heal_below and any(
+                item.heal_amount > 0 for item in player.inventory):
+            return "use_item"
+        if self._should_flee(player, enemy):
+            return "flee"
+        return "auto_attack" if player.current_health > 1 else "attack"
+
+    def choose_consumable(self, player, enemy, consumables):
+        potions = [item for item in consumables if item.heal_amount > 0]
+        return max(potions, key=lambda item: item.heal_amount) if potions else None
+
+    def continue_dungeon(self, player, room, rooms):
+        return player.current_health >= player.max_health * self.retreat_below
+
+    def shop(self, player, offered_items):
+        to_buy = []
+        gold = player.gold
+        for item in sorted(offered_items, key=_item_score, reverse=True):
+            if item.item_type in player.equipped:
+                current = player.equipped[item.item_type]
+                if _item_score(item) > (_item_score(current) if current else 0) and gold >= item.cost:
+                    to_buy.append(item)
+                    gold -= item.cost
+            elif item.heal_amount > 0 and gold >= item.cost:
+                to_buy.append(item)
+                gold -= item.cost
+        return to_buy
+
+    def manage_inventory(self, player):
+        actions = []
+        best = {}
+        for item in player.inventory:
+            slot = item.item_type
+            if slot in player.equipped:
+                rival = best.get(slot) or player.equipped[slot]
+                if rival is None or _item_score(item) > _item_score(rival):
+                    best[slot] = item
+        for slot, item in best.items():
+            actions.append(("equip", item))
+            if player.equipped[slot]:
+                actions.append(("sell", player.equipped[slot])) # Sold once it is back in the inventory
+        # Drink potions before heading out, smallest first
+        missing = player.max_health - player.current_health
+        for potion in sorted((item for item in player.inventory if item.heal_amount > 0), key=lambda item: item.heal_amount):
+            if missing <= 0:
+                break
+            actions.append(("use", potion))
+            missing -= potion.heal_amount
+        return actions
+
+BOT_POLICIES = {
+    "auto": AutoAttackPolicy,
+    "cautious": CautiousPolicy,
+}
+
+def _combat_exchange(player, enemy, rng, log_function):
+    """Player attacks, then the enemy strikes back if alive. Returns "won", "lost" or None."""
+    if enemy.take_damage(roll_player_damage(player, rng), log_function):
+        award_victory(player, enemy, log_function)
+        return "won"
+    if player.take_damage(roll_enemy_damage(enemy, rng), log_function):
+        return "lost"
+    return None
+
+def _enemy_strike(player, enemy, rng, log_function):
+    return "lost" if player.take_damage(roll_enemy_damage(enemy, rng), log_function) else None
+
+def run_policy_combat(player, enemy, policy, rng=random, log_function=NULL_SINK, max_turns=MAX_COMBAT_TURNS):
+    """Plays one fight with a policy choosing every action, using the CLI combat rules.
+
+    Returns (outcome, turns) where outcome is "won", "lost", "fled" or
+    "draw" (still going after max_turns) and turns counts enemy-facing
+    turns. A "use_item" without a usable item, or an "auto_attack" at 1 HP
+    (which would stop at once), falls back to a plain attack so a policy
+    can never stall the loop.
+    """
+    turns = 0
+    while turns < max_turns:
+        action = policy.combat_action(player, enemy)
+        turns += 1
+        if action == "use_item":
+            consumables = [item for item in player.inventory if item.item_type == "consumable"]
+            item = policy.choose_consumable(player, enemy, consumables)
+            if item is not None and item.heal_amount > 0:
+                player.heal(item.heal_amount, log_function)
+                player.inventory.remove(item)
+                outcome = _enemy_strike(player, enemy, rng, log_function)
+            else:
+                outcome = _combat_exchange(player, enemy, rng, log_function)
+        elif action == "flee":
+            if rng.random() < 0.5:
+                return "fled", turns
+            outcome = _enemy_strike(player, enemy, rng, log_function)
+        elif action == "auto_attack" and player.current_health > 1:
+            outcome = _combat_exchange(player, enemy, rng, log_function)
+            while outcome is None and player.current_health > 1 and turns < max_turns: # Auto-attack stops at 1 HP
+                turns += 1
+                outcome = _combat_exchange(player, enemy, rng, log_function)
+        else:
+            outcome = _combat_exchange(player, enemy, rng, log_function)
+        if outcome:
+            return outcome, turns
+    return "draw", turns
+
+# --- Dungeon Runs (UI-free) ---
+
+DUNGEON_ENCOUNTER_TYPES = ["combat", "nothing", "treasure", "healing"]
+DUNGEON_ENCOUNTER_WEIGHTS = [0.6, 0.2, 0.15, 0.05]
+
+class DungeonRunResult:
+    """Summary of a dungeon run resolved by run_dungeon."""
+    def __init__(self):
+        self.rooms = 0 # Number of rooms in this dungeon section
+        self.rooms_explored = 0
+        self.turns = 0 # Combat turns taken
+        self.fights_won = 0
+        self.fights_fled = 0
+        self.fights_drawn = 0 # Fights nobody could win, abandoned after MAX_COMBAT_TURNS
+        self.gold_found = 0 # Treasure gold only; combat drops are counted in gold_from_enemies
+        self.gold_from_enemies = 0
+        self.exp_gained = 0
+        self.died = False
+        self.retreated = False
+
+def run_dungeon(player, enemies, rng=random, log_function=NULL_SINK, save_file=None, policy=None,
+                max_turns=MAX_COMBAT_TURNS):
+    """Plays one dungeon section headlessly. Death applies handle_death.
+
+    Without a policy every fight is fought to the end and the player always
+    keeps exploring; with one, the policy picks combat actions and decides
+    whether to continue after each room (where the CLI would ask). A fight
+    that lasts max_turns is a draw and the player moves on, as after fleeing.
+    """
+    result = DungeonRunResult()
+    result.rooms = rng.randint(3, 7) # Number of rooms/encounters in this dungeon run
+    for room in range(1, result.rooms + 1):
+        result.rooms_explored += 1
+        encounter_type = rng.choices(DUNGEON_ENCOUNTER_TYPES, weights=DUNGEON_ENCOUNTER_WEIGHTS, k=1)[0]
+
+        if encounter_type == "combat":
+            if not enemies:
+                continue
+            enemy = rng.choice(enemies).spawn() # Fresh health for this encounter; stats are shared
+            if policy is None:
+                combat = resolve_combat(player, enemy, log_function, rng, max_turns=max_turns)
+                outcome, turns = ("won" if combat.won else "draw" if combat.draw else "lost"), combat.turns
+            else:
+                outcome, turns = run_policy_combat(player, enemy, policy, rng, log_function, max_turns)
+            result.turns += turns
+            if outcome == "won":
+                result.fights_won += 1
+                result.gold_from_enemies += enemy.gold_drop
+                result.exp_gained += enemy.exp_drop
+                continue # The CLI only asks to continue after rooms without a won fight
+            if outcome == "lost":
+                result.died = True
+                handle_death(player, log_function, rng, save_file)
+                return result
+            if outcome == "draw":
+                result.fights_drawn += 1
+            else:
+                result.fights_fled += 1
+        elif encounter_type == "treasure":
+            gold_found = rng.randint(20, 100)
+            player.gold += gold_found
+            result.gold_found += gold_found
+        elif encounter_type == "healing":
+            player.heal(rng.randint(20, 60), log_function)
+
+        if policy is not None and room < result.rooms and not policy.continue_dungeon(player, room, result.rooms):
+            result.retreated = True
+            return result
+    return result
+
+def visit_town(player, policy, shop_items, rng=random, log_function=NULL_SINK):
+    """Lets a policy shop from a random 5-item offer and manage its inventory."""
+    if shop_items:
+        offered = rng.sample(shop_items, min(5, len(shop_items))) # Same offer size as the shop menus
+        for item in policy.shop(player, offered):
+            buy_item(player, item, log_function)
+    for action, item in policy.manage_inventory(player):
+        if action == "equip" and item in player.inventory:
+            player.equip_item(item, log_function)
+        elif action == "use" and item in player.inventory and item.heal_amount > 0:
+            player.heal(item.heal_amount, log_function)
+            player.inventory.remove(item)
+        elif action == "sell" and item in player.inventory:
+            sell_item(player, item, log_function)
+
+class HeadlessStats:
+    """Counters collected by play_headless."""
+    def __init__(self):
+        self.cycles = 0
+        self.dungeons = 0
+        self.turns = 0
+        self.fights_won = 0
+        self.deaths = 0
+
+def play_headless(player, policy, cycles, rng=random, shop_items=None, enemies=None, log_function=NULL_SINK):
+    """Tight non-interactive game loop: town (shop + inventory) then a dungeon, cycles times.
+
+    shop_items and enemies default to the loaded SHOP_ITEMS and DUNGEON_ENEMIES.
+    """
+    shop_items = get_shop_items() if shop_items is None else shop_items
+    enemies = get_dungeon_enemies() if enemies is None else enemies
+    stats = HeadlessStats()
+    for _ in range(cycles):
+        visit_town(player, policy, shop_items, rng, log_function)
+        result = run_dungeon(player, enemies, rng, log_function, policy=policy)
+        stats.cycles += 1
+        stats.dungeons += 1
+        stats.turns += result.turns
+        stats.fights_won += result.fights_won
+        stats.deaths += result.died
+    return stats
+
 # --- Data Loading Functions ---
 
-def load_items_from_file(filename, log_function):
-    """Loads Item objects from a text file."""
-    items = []
+class ParseErrorSummary:
+    """Counts bad content lines by kind and keeps the first few as examples."""
+    def __init__(self, max_examples=5):
+        self.max_examples = max_examples
+        self.counts = {} # kind ("bad value", "missing fields", "bad encoding") -> number of lines
+        self.examples = [] # (line number, message) for the first max_examples errors
+
+    @property
+    def total(self):
+        return sum(self.counts.values())
+
+    def add(self, kind, line_number, message):
+        self.counts[kind] = self.counts.get(kind, 0) + 1
+        if len(self.examples) < self.max_examples:
+            self.examples.append((line_number, message))
+
+    def message(self, filename):
+        """One-line summary for the log."""
+        kinds = ", ".join(f"{count} {kind}" for kind, count in self.counts.items())
+        first_line, first_message = self.examples[0]
+        return f"Skipped {self.total} bad lines in {filename} ({kinds}). First, line {first_line}: {first_message}"
+
+def _optional_int(parts, index):
+    return int(parts[index]) if len(parts) > index and parts[index].strip().isdigit() else 0
+
+def _parse_item(line):
+    """Parses name|item_type|cost[|attack|defense|health|heal] (missing/blank bonuses are 0)."""
+    parts = line.split('|')
+    return Item(parts[0], parts[1], int(parts[2]), _optional_int(parts, 3), _optional_int(parts, 4),
+                _optional_int(parts, 5), _optional_int(parts, 6))
+
+def _parse_enemy(line):
+    """Parses name|health|attack|defense|gold_drop|exp_drop."""
+    parts = line.split('|')
+    return EnemyTemplate(parts[0], int(parts[1]), int(parts[2]), int(parts[3]), int(parts[4]), int(parts[5]))
+
+def _iter_records(filename, parse, label, expected_fields, chunk_size, predicate, errors):
+    chunk = []
     try:
-        with open(filename, 'r') as f:
-            for line in f:
+        # surrogateescape turns bad bytes into lone surrogates, so one bad byte only costs its own line
+        with open(filename, 'r', encoding="utf-8", errors="surrogateescape") as f:
+            for line_number, line in enumerate(f, 1):
                 line = line.strip()
+                if not line.isascii():
+                    try:
+                        line.encode("utf-8")
+                    except UnicodeEncodeError:
+                        if errors is not None:
+                            errors.add("bad encoding", line_number,
+                                       f"Invalid UTF-8 in {label} line {line.encode('utf-8', 'surrogateescape')!r}.")
+                        continue
                 if not line or line.startswith('#'): # Skip empty lines and comments
                     continue
                 try:
-                    parts = line.split('|')
-                    name = parts[0]
-                    item_type = parts[1]
-                    cost = int(parts[2])
-                    attack_bonus = int(parts[3]) if len(parts) > 3 and parts[3].strip().isdigit() else 0
-                    defense_bonus = int(parts[4]) if len(parts) > 4 and parts[4].strip().isdigit() else 0
-                    health_bonus = int(parts[5]) if len(parts) > 5 and parts[5].strip().isdigit() else 0
-                    heal_amount = int(parts[6]) if len(parts) > 6 and parts[6].strip().isdigit() else 0
-                    items.append(Item(name, item_type, cost, attack_bonus, defense_bonus, health_bonus, heal_amount))
+                    record = parse(line)
                 except ValueError as ve:
-                    log_function(f"Error parsing item line '{line}': {ve}. Skipping.")
-                except IndexError as ie:
-                    log_function(f"Error: Not enough fields in item line '{line}'. Expected at least 3, got {len(parts)}. Skipping.")
-        log_function(f"Loaded {len(items)} items from {filename}.")
+                    if errors is not None:
+                        errors.add("bad value", line_number, f"Error parsing {label} line '{line}': {ve}.")
+                    continue
+                except IndexError:
+                    if errors is not None:
+                        errors.add("missing fields", line_number,
+                                   f"Not enough fields in {label} line '{line}'. Expected {expected_fields}, "
+                                   f"got {line.count('|') + 1}.")
+                    continue
+                if predicate is None or predicate(record):
+                    chunk.append(record)
+                    if len(chunk) >= chunk_size:
+                        yield chunk
+                        chunk = []
+    except Exception:
+        if chunk: # Hand over what was read before the error, then let it propagate
+            yield chunk
+        raise
+    if chunk:
+        yield chunk
+
+def iter_items(filename, chunk_size=1000, predicate=None, errors=None):
+    """Streams Items from a text file as lists of up to chunk_size.
+
+    Only one chunk is held at a time. Items failing predicate(item) are
+    dropped while parsing; bad lines are counted into errors (a
+    ParseErrorSummary) instead of being logged. Raises OSError if the file
+    can't be read.
+    """
+    return _iter_records(filename, _parse_item, "item", "at least 3", chunk_size, predicate, errors)
+
+def iter_enemies(filename, chunk_size=1000, predicate=None, errors=None):
+    """Streams EnemyTemplates from a text file as lists of up to chunk_size (see iter_items)."""
+    return _iter_records(filename, _parse_enemy, "enemy", "6", chunk_size, predicate, errors)
+
+def _parse_records(filename, iterate, label, log_function):
+    """Returns (records, clean); clean is False if any line was skipped or reading failed."""
+    records = []
+    errors = ParseErrorSummary()
+    try:
+        for chunk in iterate(filename, errors=errors):
+            records.extend(chunk)
+        if errors.total:
+            emit(log_function, Message(errors.message(filename), "system"))
+        emit(log_function, Message(f"Loaded {len(records)} {label} from {filename}.", "system"))
     except FileNotFoundError:
-        log_function(f"Error: {filename} not found. Ensure the file is in the same directory as the game script.")
+        emit(log_function, Message(f"Error: {filename} not found. Ensure the file is in the same directory as the game script.", "system"))
+        return records, False
     except Exception as e:
-        log_function(f"An unexpected error occurred while loading items: {e}")
-    return items
+        emit(log_function, Message(f"An unexpected error occurred while loading {label}: {e}", "system"))
+        return records, False
+    return records, not errors.total
+
+def _load_records(filename, iterate, label, log_function):
+    return _parse_records(filename, iterate, label, log_function)[0]
+
+def load_items_from_file(filename, log_function):
+    """Loads Item objects from a text file."""
+    return _load_records(filename, iter_items, "items", log_function)
 
 def load_enemies_from_file(filename, log_function):
-    """Loads Enemy objects from a text file."""
-    enemies = []
+    """Loads EnemyTemplate objects from a text file."""
+    return _load_records(filename, iter_enemies, "enemies", log_function)
+
+# --- Compiled Content Cache ---
+# Parsed content files are cached next to the source as "<file>.nrc": a
+# fixed header, one fixed-width record per entry and a UTF-8 string blob.
+# The cache is used while the source's mtime and size (or, failing that,
+# its SHA-1) still match, and is rebuilt from the text file otherwise.
+
+CACHE_SUFFIX = ".nrc"
+_CACHE_MAGIC = b"NRCC"
+_CACHE_VERSION = 1
+_CACHE_HEADER = struct.Struct("<4sHcqqI20s") # magic, version, kind, mtime_ns, size, count, sha1
+_ITEM_RECORD = struct.Struct("<IIIIqqqqq") # name offset/length, type offset/length, cost, bonuses, heal
+_ENEMY_RECORD = struct.Struct("<IIqqqqq") # name offset/length, health, attack, defense, gold, exp
+
+def _file_sha1(filename):
+    digest = hashlib.sha1()
+    with open(filename, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.digest()
+
+def _write_content_cache(cache_file, kind, source_stat, sha1, entries):
+    """Writes the compiled cache atomically; silently gives up if the directory isn't writable."""
+    blob = bytearray()
+    strings = {}
+    def intern_string(text):
+        if text not in strings:
+            encoded = text.encode("utf-8")
+            strings[text] = (len(blob), len(encoded))
+            blob.extend(encoded)
+        return strings[text]
+
+    records = bytearray()
+    for entry in entries:
+        name_offset, name_length = intern_string(entry.name)
+        if kind == b"I":
+            type_offset, type_length = intern_string(entry.item_type)
+            records += _ITEM_RECORD.pack(name_offset, name_length, type_offset, type_length, entry.cost,
+                                         entry.attack_bonus, entry.defense_bonus, entry.health_bonus, entry.heal_amount)
+        else:
+            records += _ENEMY_RECORD.pack(name_offset, name_length, entry.health_full, entry.attack,
+                                          entry.defense, entry.gold_drop, entry.exp_drop)
+    header = _CACHE_HEADER.pack(_CACHE_MAGIC, _CACHE_VERSION, kind, source_stat.st_mtime_ns,
+                                source_stat.st_size, len(entries), sha1)
+    temp_file = f"{cache_file}.{os.getpid()}.tmp"
     try:
-        with open(filename, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if not line or line.startswith('#'): # Skip empty lines and comments
-                    continue
-                try:
-                    parts = line.split('|')
-                    name = parts[0]
-                    health = int(parts[1])
-                    attack = int(parts[2])
-                    defense = int(parts[3])
-                    gold_drop = int(parts[4])
-                    exp_drop = int(parts[5])
-                    enemies.append(Enemy(name, health, attack, defense, gold_drop, exp_drop))
-                except ValueError as ve:
-                    log_function(f"Error parsing enemy line '{line}': {ve}. Skipping.")
-                except IndexError as ie:
-                    log_function(f"Error: Not enough fields in enemy line '{line}'. Expected 6, got {len(parts)}. Skipping.")
-        log_function(f"Loaded {len(enemies)} enemies from {filename}.")
-    except FileNotFoundError:
-        log_function(f"Error: {filename} not found. Ensure the file is in the same directory as the game script.")
-    except Exception as e:
-        log_function(f"An unexpected error occurred while loading enemies: {e}")
-    return enemies
+        with open(temp_file, "wb") as f:
+            f.write(header)
+            f.write(records)
+            f.write(blob)
+        os.replace(temp_file, cache_file)
+    except OSError:
+        try:
+            os.remove(temp_file)
+        except OSError:
+            pass
 
-# --- Game Persistence ---
+def _decode_cache_entries(view, kind, count):
+    """Builds the entries of a mapped cache file.
+
+    The record and string slices of view only live in this call, so they
+    are released before the caller closes the mapping.
+    """
+    record = _ITEM_RECORD if kind == b"I" else _ENEMY_RECORD
+    records_start = _CACHE_HEADER.size
+    blob_start = records_start + record.size * count
+    records = view[records_start:blob_start]
+    blob = view[blob_start:]
+    strings = {}
+    def read_string(offset, length):
+        text = strings.get(offset)
+        if text is None:
+            text = strings[offset] = str(blob[offset:offset + length], "utf-8")
+        return text
+
+    if kind == b"I":
+        return [Item(read_string(name_offset, name_length), read_string(type_offset, type_length),
+                     cost, attack_bonus, defense_bonus, health_bonus, heal_amount)
+                for name_offset, name_length, type_offset, type_length,
+                    cost, attack_bonus, defense_bonus, health_bonus, heal_amount
+                in record.iter_unpack(records)]
+    return [EnemyTemplate(read_string(name_offset, name_length), health, attack, defense, gold_drop, exp_drop)
+            for name_offset, name_length, health, attack, defense, gold_drop, exp_drop
+            in record.iter_unpack(records)]
+
+def _read_content_cache(cache_file, kind, source_stat, filename):
+    """Returns (entries, header_current), or (None, False) if the cache is missing, stale or damaged.
+
+    header_current is False when only the content hash matched (the source
+    was touched but not changed), so the header should be refreshed.
+    """
+    try:
+        with open(cache_file, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                magic, version, cached_kind, mtime_ns, size, count, sha1 = _CACHE_HEADER.unpack_from(view)
+                if magic != _CACHE_MAGIC or version != _CACHE_VERSION or cached_kind != kind:
+                    return None, False
+                header_current = (mtime_ns, size) == (source_stat.st_mtime_ns, source_stat.st_size)
+                if not header_current:
+                    # Touched but maybe not changed: trust the content hash
+                    if size != source_stat.st_size or sha1 != _file_sha1(filename):
+                        return None, False
+                return _decode_cache_entries(view, kind, count), header_current
+            finally:
+                view.release()
+    except (OSError, ValueError, struct.error, UnicodeDecodeError):
+        return None, False
 
-def save_game(player, save_file, log_function):
-    """Saves the current game state to a JSON file."""
+def _load_compiled(filename, kind, iterate, log_function):
+    label = "items" if kind == b"I" else "enemies"
     try:
-        player_data = {
-            "name": player.name,
-            "level": player.level,
-            "experience": player.experience,
-            "max_health": player.max_health,
-            "current_health": player.current_health,
-            "attack": player.attack,
-            "defense": player.defense,
-            "gold": player.gold,
-            "inventory": [item.to_dict() for item in player.inventory],
-            "equipped": {
-                slot: item.to_dict() if item else None
-                for slot, item in player.equipped.items()
-            }
+        source_stat = os.stat(filename)
+    except OSError:
+        return _load_records(filename, iterate, label, log_function) # Let the parser report the missing file
+    cache_file = filename + CACHE_SUFFIX
+    entries, header_current = _read_content_cache(cache_file, kind, source_stat, filename)
+    if entries is not None:
+        if not header_current:
+            try:
+                _write_content_cache(cache_file, kind, source_stat, _file_sha1(filename), entries)
+            except OSError:
+                pass # Only the header refresh is lost; the cached entries are still good
+        emit(log_function, Message(f"Loaded {len(entries)} {label} from {filename} (compiled cache).", "system"))
+        return entries
+    try:
+        sha1 = _file_sha1(filename)
+    except OSError:
+        return _load_records(filename, iterate, label, log_function) # Unreadable or gone: let the parser report it
+    entries, clean = _parse_records(filename, iterate, label, log_function)
+    if clean: # Never cache a partial parse, so its errors are reported again until the file is fixed
+        _write_content_cache(cache_file, kind, source_stat, sha1, entries)
+    return entries
+
+def load_items_cached(filename, log_function):
+    """Loads items through the compiled cache, rebuilding it when the text file changed."""
+    return _load_compiled(filename, b"I", iter_items, log_function)
+
+def load_enemies_cached(filename, log_function):
+    """Loads enemy templates through the compiled cache, rebuilding it when the text file changed."""
+    return _load_compiled(filename, b"E", iter_enemies, log_function)
+
+# --- Content Catalog ---
+
+ITEM_STATS = ("cost", "attack_bonus", "defense_bonus", "health_bonus", "heal_amount")
+MAX_ENEMY_LEVEL = 1000 # Enemies not beatable by then are rated at this level
+ENEMY_LEVEL_BAND = 5 # enemies_for_level includes enemies rated up to this many levels lower
+
+@functools.lru_cache(maxsize=None)
+def _mean_damage(attack, variance, defense):
+    return sum(damage * chance for damage, chance in _damage_distribution(attack, variance, defense))
+
+def enemy_level(enemy):
+    """Rough difficulty rating: the lowest level at which an unequipped player
+    kills the enemy before dying, using average damage on both sides.
+    """
+    return _enemy_level_for(enemy.health_full, enemy.attack, enemy.defense)
+
+@functools.lru_cache(maxsize=65536)
+def _enemy_level_for(enemy_health, enemy_attack, enemy_defense):
+    def beats(level):
+        attack = STARTING_ATTACK + ATTACK_PER_LEVEL * (level - 1)
+        defense = STARTING_DEFENSE + DEFENSE_PER_LEVEL * (level - 1)
+        health = STARTING_HEALTH + HEALTH_PER_LEVEL * (level - 1)
+        dealt = _mean_damage(attack, 5, enemy_defense)
+        taken = _mean_damage(enemy_attack, 3, defense)
+        if dealt <= 0:
+            return False
+        if taken <= 0:
+            return True
+        return math.ceil(enemy_health / dealt) <= math.ceil(health / taken) # Player strikes first
+
+    low, high = 1, MAX_ENEMY_LEVEL
+    while low < high: # Stronger levels never do worse, so bisect for the first winning level
+        middle = (low + high) // 2
+        if beats(middle):
+            high = middle
+        else:
+            low = middle + 1
+    return low
+
+class _SortedIndex:
+    """Entries sorted by a numeric key, with parallel key list for bisect."""
+    __slots__ = ("keys", "entries")
+
+    def __init__(self, entries, key):
+        pairs = sorted(((key(entry), position, entry) for position, entry in enumerate(entries)),
+                       key=lambda pair: (pair[0], pair[1]))
+        self.keys = [pair[0] for pair in pairs]
+        self.entries = [pair[2] for pair in pairs]
+
+    def between(self, low=None, high=None):
+        """Entries with low <= key <= high (either bound may be None)."""
+        start = 0 if low is None else bisect.bisect_left(self.keys, low)
+        end = len(self.keys) if high is None else bisect.bisect_right(self.keys, high)
+        return self.entries[start:end]
+
+class ContentCatalog:
+    """Indexed view over loaded items and enemy templates.
+
+    Name and type lookups are dictionary hits; cost/stat ranges and enemy
+    difficulty are bisected from sorted indexes built on first use.
+    """
+    def __init__(self, items, enemies):
+        self.items = list(items)
+        self.enemies = list(enemies)
+        self.items_by_name = {item.name: item for item in self.items}
+        self.enemies_by_name = {enemy.name: enemy for enemy in self.enemies}
+        self.items_by_type = {}
+        for item in self.items:
+            self.items_by_type.setdefault(item.item_type, []).append(item)
+        self._stat_indexes = {}
+        self._enemy_index = None
+
+    def item(self, name):
+        """Item with this name, or None."""
+        return self.items_by_name.get(name)
+
+    def enemy(self, name):
+        """Enemy template with this name, or None."""
+        return self.enemies_by_name.get(name)
+
+    def items_of_type(self, item_type):
+        """All items of one type ("weapon", "armor", "accessory", "consumable")."""
+        return self.items_by_type.get(item_type, [])
+
+    def items_in_range(self, stat, low=None, high=None, item_type=None):
+        """Items whose stat (one of ITEM_STATS) lies in [low, high], sorted by that stat."""
+        key = (stat, item_type)
+        index = self._stat_indexes.get(key)
+        if index is None:
+            if stat not in ITEM_STATS:
+                raise ValueError(f"Unknown item stat '{stat}'. Expected one of {', '.join(ITEM_STATS)}.")
+            entries = self.items if item_type is None else self.items_of_type(item_type)
+            index = self._stat_indexes[key] = _SortedIndex(entries, lambda item: getattr(item, stat))
+        return index.between(low, high)
+
+    def items_under(self, max_cost, item_type=None):
+        """Items costing at most max_cost, cheapest first (e.g. weapons under 200 gold)."""
+        return self.items_in_range("cost", None, max_cost, item_type)
+
+    def enemy_level(self, enemy):
+        """Difficulty rating of an enemy template (see enemy_level)."""
+        return enemy_level(enemy)
+
+    def enemies_for_level(self, level, band=ENEMY_LEVEL_BAND):
+        """Enemies rated between level - band and level, hardest last."""
+        if self._enemy_index is None:
+            self._enemy_index = _SortedIndex(self.enemies, enemy_level)
+        return self._enemy_index.between(level - band, level)
+
+# --- Binary Saves ---
+# Save files ending in ".nrs" use a compact binary layout instead of JSON:
+# a header (magic, version, CRC32 and length of the payload), then the
+# player's stats, a deduplicated item table and inventory/equipment slots
+# as indices into that table. Numbers are variable-length (zigzag LEB128),
+# so small values take a byte or two and huge experience or gold still fits.
+# Every item is stored with its full stats: saved attack/defense/max health
+# already include the equipped bonuses, so items must come back exactly as
+# they were even if the content files have changed since.
+
+BINARY_SAVE_SUFFIX = ".nrs"
+_SAVE_MAGIC = b"NRSV"
+_SAVE_VERSION = 2
+_SAVE_HEADER = struct.Struct("<4sHII") # magic, version, crc32, payload length
+_SAVE_STRING = struct.Struct("<H")
+# Version 1 layout (still readable): fixed-width numbers, and items matching
+# the catalog stored by name only
+_SAVE_PLAYER_V1 = struct.Struct("<qqqqqqqIII") # level, exp, max/current health, attack, defense, gold, table/inventory/equipped counts
+_SAVE_ITEM_V1 = struct.Struct("<qqqqq") # cost, attack, defense, health bonuses, heal amount
+_SAVE_INDEX_V1 = struct.Struct("<I")
+_NO_ITEM_V1 = 0xFFFFFFFF # Index of an empty equipment slot
+_ITEM_BY_NAME, _ITEM_INLINE = 0, 1
+
+def _item_fields(item):
+    return (item.name, item.item_type, item.cost, item.attack_bonus, item.defense_bonus,
+            item.health_bonus, item.heal_amount)
+
+def _pack_string(out, text):
+    encoded = text.encode("utf-8")
+    out += _SAVE_STRING.pack(len(encoded))
+    out += encoded
+
+def _unpack_string(data, offset):
+    (length,) = _SAVE_STRING.unpack_from(data, offset)
+    offset += _SAVE_STRING.size
+    return bytes(data[offset:offset + length]).decode("utf-8"), offset + length
+
+def _pack_int(out, value):
+    """Appends any int as a zigzag LEB128 varint."""
+    value = value * 2 if value >= 0 else -value * 2 - 1
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def _unpack_int(data, offset):
+    value = shift = 0
+    while True:
+        byte = data[offset] # IndexError past the end, reported as a malformed save
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            break
+        shift += 7
+    return (value >> 1 if not value & 1 else -(value >> 1) - 1), offset
+
+def encode_binary_save(player):
+    """Returns the binary save bytes for a player."""
+    table = {} # item fields -> table index
+    def index_of(item):
+        fields = _item_fields(item)
+        index = table.get(fields)
+        if index is None:
+            index = table[fields] = len(table)
+        return index
+    inventory = [index_of(item) for item in player.inventory]
+    equipped = [(slot, -1 if item is None else index_of(item)) for slot, item in player.equipped.items()]
+
+    payload = bytearray()
+    for value in (player.level, player.experience, player.max_health, player.current_health,
+                  player.attack, player.defense, player.gold, len(table), len(inventory), len(equipped)):
+        _pack_int(payload, value)
+    _pack_string(payload, player.name)
+    for fields in table: # Dicts keep insertion order, which matches the indices
+        _pack_string(payload, fields[0])
+        _pack_string(payload, fields[1])
+        for value in fields[2:]:
+            _pack_int(payload, value)
+    for index in inventory:
+        _pack_int(payload, index)
+    for slot, index in equipped:
+        _pack_string(payload, slot)
+        _pack_int(payload, index) # -1 for an empty slot
+    return _SAVE_HEADER.pack(_SAVE_MAGIC, _SAVE_VERSION, zlib.crc32(payload), len(payload)) + payload
+
+def _decode_payload(payload):
+    stats = []
+    offset = 0
+    for _ in range(10):
+        value, offset = _unpack_int(payload, offset)
+        stats.append(value)
+    table_count, inventory_count, equipped_count = stats[7:]
+    name, offset = _unpack_string(payload, offset)
+    table = []
+    for _ in range(table_count):
+        item_name, offset = _unpack_string(payload, offset)
+        item_type, offset = _unpack_string(payload, offset)
+        fields = [item_name, item_type]
+        for _ in range(5):
+            value, offset = _unpack_int(payload, offset)
+            fields.append(value)
+        table.append(fields)
+    inventory = []
+    for _ in range(inventory_count):
+        index, offset = _unpack_int(payload, offset)
+        inventory.append(index)
+    equipped = {}
+    for _ in range(equipped_count):
+        slot, offset = _unpack_string(payload, offset)
+        index, offset = _unpack_int(payload, offset)
+        equipped[slot] = None if index < 0 else Item(*table[index])
+    return name, stats[:7], table, inventory, equipped
+
+def _decode_payload_v1(payload, catalog):
+    (level, experience, max_health, current_health, attack, defense, gold,
+     table_count, inventory_count, equipped_count) = _SAVE_PLAYER_V1.unpack_from(payload)
+    name, offset = _unpack_string(payload, _SAVE_PLAYER_V1.size)
+    table = []
+    for _ in range(table_count):
+        kind = payload[offset]
+        item_name, offset = _unpack_string(payload, offset + 1)
+        if kind == _ITEM_BY_NAME:
+            known = catalog.item(item_name) if catalog else None
+            if known is None:
+                raise ValueError(f"item '{item_name}' is not in the loaded content")
+            table.append(_item_fields(known))
+        else:
+            item_type, offset = _unpack_string(payload, offset)
+            table.append((item_name, item_type) + _SAVE_ITEM_V1.unpack_from(payload, offset))
+            offset += _SAVE_ITEM_V1.size
+    inventory = struct.unpack_from(f"<{inventory_count}I", payload, offset)
+    offset += _SAVE_INDEX_V1.size * inventory_count
+    equipped = {}
+    for _ in range(equipped_count):
+        slot, offset = _unpack_string(payload, offset)
+        (index,) = _SAVE_INDEX_V1.unpack_from(payload, offset)
+        offset += _SAVE_INDEX_V1.size
+        equipped[slot] = None if index == _NO_ITEM_V1 else Item(*table[index])
+    return name, [level, experience, max_health, current_health, attack, defense, gold], table, inventory, equipped
+
+def decode_binary_save(data, catalog=None):
+    """Rebuilds a Player from binary save bytes. Raises ValueError if the data is damaged.
+
+    catalog is only needed for version 1 saves, which stored some items by name.
+    """
+    if len(data) < _SAVE_HEADER.size:
+        raise ValueError("save file is truncated")
+    magic, version, checksum, length = _SAVE_HEADER.unpack_from(data)
+    if magic != _SAVE_MAGIC:
+        raise ValueError("not a NotRouge binary save")
+    if version not in (1, _SAVE_VERSION):
+        raise ValueError(f"unsupported save version {version}")
+    payload = memoryview(data)[_SAVE_HEADER.size:]
+    if len(payload) != length or zlib.crc32(payload) != checksum:
+        raise ValueError("save file is corrupted (checksum mismatch)")
+    try:
+        if version == 1:
+            name, stats, table, inventory, equipped = _decode_payload_v1(payload, catalog)
+        else:
+            name, stats, table, inventory, equipped = _decode_payload(payload)
+        items = [Item(*table[index]) for index in inventory] # Separate objects per slot, as with JSON
+    except (struct.error, IndexError, UnicodeDecodeError) as e:
+        raise ValueError(f"save file is malformed ({e})")
+
+    player = Player(name)
+    (player.level, player.experience, player.max_health, player.current_health,
+     player.attack, player.defense, player.gold) = stats
+    player.inventory = items
+    player.equipped = equipped
+    return player
+
+# --- Game Persistence ---
+
+SAVE_BACKUPS = 3 # Previous saves kept as "<file>.bak1" (newest) to "<file>.bak3"
+
+def encode_save(player, binary=False):
+    """Serializes a player to save-file bytes (binary or indented JSON)."""
+    if binary:
+        return encode_binary_save(player)
+    player_data = {
+        "name": player.name,
+        "level": player.level,
+        "experience": player.experience,
+        "max_health": player.max_health,
+        "current_health": player.current_health,
+        "attack": player.attack,
+        "defense": player.defense,
+        "gold": player.gold,
+        "inventory": [item.to_dict() for item in player.inventory],
+        "equipped": {
+            slot: item.to_dict() if item else None
+            for slot, item in player.equipped.items()
         }
-        with open(save_file, "w") as f:
-            json.dump(player_data, f, indent=4)
-        log_function("Game saved successfully!")
+    }
+    return json.dumps(player_data, indent=4).encode("utf-8")
+
+def backup_file(save_file, number):
+    """Name of the number-th most recent backup of a save file."""
+    return f"{save_file}.bak{number}"
+
+def _fsync_directory(path):
+    """Makes a rename durable; not every platform can open directories, which is fine."""
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def write_file_atomically(path, data, backups=0):
+    """Writes data to a temp file, fsyncs it, rotates backups and renames it over path.
+
+    A crash at any point leaves either the old or the new file in place,
+    never a partial one: the newest backup is a hard link (or copy) of the
+    live file, which stays where it is until the new file replaces it.
+    """
+    temp_file = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(temp_file, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        if backups and os.path.exists(path):
+            for number in range(backups, 1, -1):
+                older = backup_file(path, number - 1)
+                if os.path.exists(older):
+                    os.replace(older, backup_file(path, number))
+            newest = backup_file(path, 1)
+            if os.path.exists(newest): # Only when keeping a single backup
+                os.remove(newest)
+            try:
+                os.link(path, newest)
+            except OSError: # No hard links here (e.g. some network or FAT drives)
+                shutil.copy2(path, newest)
+        os.replace(temp_file, path)
+    except BaseException:
+        try:
+            os.remove(temp_file)
+        except OSError:
+            pass
+        raise
+    _fsync_directory(path)
+
+def save_game(player, save_file, log_function, binary=None):
+    """Saves the current game state atomically, keeping SAVE_BACKUPS older saves.
+
+    save_file may also be a ProfileStore, which saves the player's profile.
+    The format follows the file name (".nrs" is binary, anything else JSON)
+    unless binary is given explicitly. Returns True on success.
+    """
+    if isinstance(save_file, (ProfileStore, SaveJournal)):
+        return save_file.save(player, log_function)
+    if binary is None:
+        binary = save_file.endswith(BINARY_SAVE_SUFFIX)
+    try:
+        state = player.save_state()
+        write_file_atomically(save_file, encode_save(player, binary), SAVE_BACKUPS)
+        player.mark_saved(state)
+        emit(log_function, Message("Game saved successfully!", "system"))
+        return True
     except Exception as e:
-        log_function(f"Error saving game: {e}")
+        emit(log_function, Message(f"Error saving game: {e}", "system"))
+        return False
+
+def _read_save(save_file):
+    """Reads a JSON, binary or journal save file (detected from its contents) into a Player."""
+    with open(save_file, "rb") as f:
+        magic = f.read(len(_SAVE_MAGIC))
+    if magic == _SAVE_MAGIC:
+        with open(save_file, "rb") as f:
+            player = decode_binary_save(f.read(), get_catalog())
+        player.mark_saved()
+        return player
+    if magic == _JOURNAL_MAGIC:
+        return read_journal(save_file)[0]
+    with open(save_file, "r") as f:
+        player_data = json.load(f)
 
-def load_game(save_file, log_function):
-    """Loads a game state from a JSON file."""
-    if not os.path.exists(save_file):
-        log_function("No save file found.")
+    player = Player(player_data["name"])
+    player.level = player_data["level"]
+    player.experience = player_data["experience"]
+    player.max_health = player_data["max_health"]
+    player.current_health = player_data["current_health"]
+    player.attack = player_data["attack"]
+    player.defense = player_data["defense"]
+    player.gold = player_data["gold"]
+    player.inventory = [Item.from_dict(d) for d in player_data["inventory"]]
+    player.equipped = {
+        slot: Item.from_dict(d) if d else None
+        for slot, d in player_data["equipped"].items()
+    }
+    player.mark_saved()
+    return player
+
+def load_game(save_file, log_function, profile=None):
+    """Loads a game state from a JSON or binary save file.
+
+    If the save is missing or damaged, the newest readable backup is loaded
+    instead. save_file may also be a ProfileStore, with the profile name to load.
+    """
+    if isinstance(save_file, ProfileStore):
+        return save_file.load(profile, log_function)
+    if isinstance(save_file, SaveJournal):
+        return save_file.load(log_function)
+    if os.path.exists(save_file):
+        try:
+            player = _read_save(save_file)
+            emit(log_function, Message("Game loaded successfully!", "system"))
+            return player
+        except Exception as e:
+            emit(log_function, Message(f"Error loading game: {e}", "system"))
+    elif not os.path.exists(backup_file(save_file, 1)):
+        emit(log_function, Message("No save file found.", "system"))
         return None
-    try:
-        with open(save_file, "r") as f:
-            player_data = json.load(f)
-        
-        player = Player(player_data["name"])
-        player.level = player_data["level"]
-        player.experience = player_data["experience"]
-        player.max_health = player_data["max_health"]
-        player.current_health = player_data["current_health"]
-        player.attack = player_data["attack"]
-        player.defense = player_data["defense"]
-        player.gold = player_data["gold"]
-        player.inventory = [Item.from_dict(d) for d in player_data["inventory"]]
-        player.equipped = {
-            slot: Item.from_dict(d) if d else None
-            for slot, d in player_data["equipped"].items()
-        }
-        log_function("Game loaded successfully!")
+    for number in range(1, SAVE_BACKUPS + 1):
+        backup = backup_file(save_file, number)
+        if not os.path.exists(backup):
+            continue
+        try:
+            player = _read_save(backup)
+        except Exception:
+            continue
+        emit(log_function, Message(f"Recovered your game from backup {backup}.", "system"))
         return player
-    except Exception as e:
-        log_function(f"Error loading game: {e}")
+    return None
+
+class AsyncSaver:
+    """Saves games on a background thread so the caller never waits on disk I/O.
+
+    save() takes a cheap snapshot of the player and returns immediately.
+    If several saves to the same file queue up before the worker gets to
+    them, only the latest is written. log_function is called from the
+    worker thread, so GUIs should pass something thread-safe (e.g. a Qt
+    signal's emit).
+    """
+    def __init__(self):
+        self._pending = {} # save_file (or store and profile) -> (player, snapshot, save_file, log_function, binary), newest wins
+        self._condition = threading.Condition()
+        self._busy = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="NotRouge-saver", daemon=True)
+        self._thread.start()
+
+    def save(self, player, save_file, log_function, binary=None):
+        """Queues a save of the player's current state.
+
+        The player is marked saved (as of this call) once the write has
+        succeeded, so a failed save leaves it dirty and is retried by the
+        next autosave.
+        """
+        snapshot = snapshot_player(player)
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("AsyncSaver is closed")
+            key = (save_file, player.name) if isinstance(save_file, ProfileStore) else save_file
+            self._pending[key] = (player, snapshot, save_file, log_function, binary)
+            self._condition.notify_all()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._closed:
+                    self._condition.wait()
+                if not self._pending: # Closed and drained
+                    return
+                player, snapshot, save_file, log_function, binary = self._pending.pop(next(iter(self._pending)))
+                self._busy = True
+            try:
+                if save_game(snapshot, save_file, log_function, binary):
+                    player.mark_saved(snapshot.save_state()) # Edits made since queueing still count as unsaved
+            finally:
+                with self._condition:
+                    self._busy = False
+                    self._condition.notify_all()
+
+    def flush(self, timeout=None):
+        """Waits until every queued save is on disk. Returns False on timeout."""
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._pending and not self._busy, timeout)
+
+    def close(self, timeout=None):
+        """Writes any queued saves and stops the worker thread."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join(timeout)
+
+# --- Save Journal ---
+# A journal file holds one full snapshot (a binary save) followed by delta
+# records containing only the fields that changed since the previous record;
+# inventory changes are stored as a splice (replace items start:stop with
+# the new ones). Every record is framed with its length and CRC32, so a
+# record torn by a crash is simply ignored when loading. After
+# JOURNAL_COMPACT_EVERY deltas the journal is rewritten as a fresh snapshot.
+
+JOURNAL_SUFFIX = ".nrj"
+JOURNAL_COMPACT_EVERY = 50
+_JOURNAL_MAGIC = b"NRJL"
+_JOURNAL_VERSION = 1
+_JOURNAL_HEADER = struct.Struct("<4sH") # magic, version
+_JOURNAL_RECORD = struct.Struct("<cII") # kind (S = snapshot, D = delta), payload length, crc32
+_SCALAR_FIELDS = ("name", "level", "experience", "max_health", "current_health", "attack", "defense", "gold")
+
+def _splice(old, new):
+    """(start, stop, replacement) such that old[start:stop] = replacement turns old into new."""
+    start = 0
+    limit = min(len(old), len(new))
+    while start < limit and old[start] is new[start]:
+        start += 1
+    end = 0
+    while end < limit - start and old[-1 - end] is new[-1 - end]:
+        end += 1
+    return start, len(old) - end, new[start:len(new) - end]
+
+def _encode_delta(old_state, player):
+    """JSON bytes for the fields of player that changed since old_state, or None if nothing did."""
+    new_state = player.save_state()
+    delta = {}
+    for field, old, new in zip(_SCALAR_FIELDS, old_state, new_state):
+        if old != new:
+            delta[field] = new
+    if old_state[8] != new_state[8]:
+        start, stop, added = _splice(old_state[8], new_state[8])
+        delta["inventory"] = [start, stop, [_item_fields(item) for item in added]]
+    if old_state[9] != new_state[9]:
+        old_equipped = dict(old_state[9])
+        delta["equipped"] = {slot: item and _item_fields(item) for slot, item in new_state[9]
+                             if slot not in old_equipped or old_equipped[slot] is not item}
+    if not delta:
+        return None
+    return json.dumps(delta, separators=(",", ":")).encode("utf-8")
+
+def _apply_delta(player, data):
+    delta = json.loads(bytes(data))
+    for field in _SCALAR_FIELDS:
+        if field in delta:
+            setattr(player, field, delta[field])
+    if "inventory" in delta:
+        start, stop, added = delta["inventory"]
+        player.inventory[start:stop] = [Item(*fields) for fields in added]
+    for slot, fields in delta.get("equipped", {}).items():
+        player.equipped[slot] = Item(*fields) if fields else None
+
+def _journal_record(kind, payload):
+    return _JOURNAL_RECORD.pack(kind, len(payload), zlib.crc32(payload)) + payload
+
+def read_journal(journal_file):
+    """Replays a journal file. Returns (player, number of deltas applied, intact).
+
+    Stops at the first incomplete or damaged record, which can only be the
+    tail of a write that was interrupted; intact is False in that case.
+    """
+    with open(journal_file, "rb") as f:
+        data = memoryview(f.read())
+    if len(data) < _JOURNAL_HEADER.size:
+        raise ValueError("journal is truncated")
+    magic, version = _JOURNAL_HEADER.unpack_from(data)
+    if magic != _JOURNAL_MAGIC or version != _JOURNAL_VERSION:
+        raise ValueError("not a NotRouge save journal (or an unsupported version)")
+    player = None
+    deltas = 0
+    offset = _JOURNAL_HEADER.size
+    while offset + _JOURNAL_RECORD.size <= len(data):
+        kind, length, checksum = _JOURNAL_RECORD.unpack_from(data, offset)
+        payload = data[offset + _JOURNAL_RECORD.size:offset + _JOURNAL_RECORD.size + length]
+        if len(payload) != length or zlib.crc32(payload) != checksum:
+            break
+        if kind == b"S":
+            player = decode_binary_save(payload, get_catalog())
+            deltas = 0
+        elif player is not None:
+            _apply_delta(player, payload)
+            deltas += 1
+        offset += _JOURNAL_RECORD.size + length
+    if player is None:
+        raise ValueError("journal has no snapshot")
+    player.mark_saved()
+    return player, deltas, offset == len(data)
+
+class SaveJournal:
+    """An append-only save file: each save appends only what changed.
+
+    The first save in a session (and every JOURNAL_COMPACT_EVERY saves)
+    writes a full snapshot atomically; the rest append small delta records,
+    so frequent autosaves stay cheap even with large inventories. Saving is
+    not thread-safe by itself; use it from one thread or via an AsyncSaver.
+    Opt-in: the CLI and GUI save full files or profiles; pass a SaveJournal
+    as the save_file of save_game or AutosaveScheduler to use one.
+    """
+    def __init__(self, path, compact_every=JOURNAL_COMPACT_EVERY, durable=True):
+        self.path = path
+        self.compact_every = compact_every
+        self.durable = durable # fsync after every append
+        self._state = None # save_state() of the player as last written here
+        self._deltas = 0
+
+    def save(self, player, log_function):
+        """Appends the changes since the last save (or compacts). Returns True on success."""
+        try:
+            state = player.save_state()
+            if self._state is None or self._state[0] != player.name or self._deltas >= self.compact_every:
+                self.compact(player)
+            else:
+                payload = _encode_delta(self._state, player)
+                if payload is not None:
+                    with open(self.path, "ab") as f:
+                        f.write(_journal_record(b"D", payload))
+                        if self.durable:
+                            f.flush()
+                            os.fsync(f.fileno())
+                    self._deltas += 1
+            self._state = state
+            player.mark_saved(state)
+            emit(log_function, Message("Game saved successfully!", "system"))
+            return True
+        except Exception as e:
+            self._state = None # Start over with a snapshot next time
+            emit(log_function, Message(f"Error saving game: {e}", "system"))
+            return False
+
+    def compact(self, player):
+        """Replaces the journal with a single snapshot of the player."""
+        data = _JOURNAL_HEADER.pack(_JOURNAL_MAGIC, _JOURNAL_VERSION) + _journal_record(b"S", encode_save(player, binary=True))
+        write_file_atomically(self.path, data)
+        self._state = player.save_state()
+        self._deltas = 0
+
+    def load(self, log_function):
+        """Loads the player from the journal, or returns None if it is missing or unreadable."""
+        if not os.path.exists(self.path):
+            emit(log_function, Message("No save file found.", "system"))
+            return None
+        try:
+            player, deltas, intact = read_journal(self.path)
+        except Exception as e:
+            emit(log_function, Message(f"Error loading game: {e}", "system"))
+            return None
+        # Later saves continue this journal, unless a torn record would hide them
+        self._state = player.save_state() if intact else None
+        self._deltas = deltas
+        emit(log_function, Message("Game loaded successfully!", "system"))
+        return player
+
+# --- Profile Store ---
+
+class ProfileStore:
+    """Many named player profiles in one SQLite database.
+
+    Each profile is one row keyed by the player's name, holding the binary
+    save plus a few summary columns, so listing profiles or loading one
+    never reads or parses the others. Safe to share with an AsyncSaver.
+    """
+    def __init__(self, path=PROFILE_DB):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL") # Readers don't wait for a save in progress
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS profiles ("
+                " name TEXT PRIMARY KEY, level INTEGER, gold INTEGER, updated REAL, data BLOB NOT NULL)")
+
+    def list_profiles(self):
+        """Returns [(name, level, gold)] for every profile, most recently saved first."""
+        with self._lock:
+            return self._connection.execute(
+                "SELECT name, level, gold FROM profiles ORDER BY updated DESC").fetchall()
+
+    def __contains__(self, name):
+        with self._lock:
+            return self._connection.execute("SELECT 1 FROM profiles WHERE name = ?", (name,)).fetchone() is not None
+
+    def save(self, player, log_function):
+        """Saves the player under their name, replacing any earlier save. Returns True on success."""
+        try:
+            state = player.save_state()
+            data = encode_save(player, binary=True)
+            with self._lock, self._connection:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO profiles (name, level, gold, updated, data) VALUES (?, ?, ?, ?, ?)",
+                    (player.name, player.level, player.gold, time.time(), data))
+            player.mark_saved(state)
+            emit(log_function, Message("Game saved successfully!", "system"))
+            return True
+        except Exception as e:
+            emit(log_function, Message(f"Error saving game: {e}", "system"))
+            return False
+
+    def load(self, name, log_function):
+        """Loads the named profile, or returns None if there is none (or it can't be read)."""
+        try:
+            with self._lock:
+                row = self._connection.execute("SELECT data FROM profiles WHERE name = ?", (name,)).fetchone()
+            if row is None:
+                emit(log_function, Message(f"No saved profile named {name}.", "system"))
+                return None
+            player = decode_binary_save(row[0], get_catalog())
+            player.mark_saved()
+            emit(log_function, Message("Game loaded successfully!", "system"))
+            return player
+        except Exception as e:
+            emit(log_function, Message(f"Error loading game: {e}", "system"))
+            return None
+
+    def delete(self, name):
+        """Removes a profile. Returns True if it existed."""
+        with self._lock, self._connection:
+            return self._connection.execute("DELETE FROM profiles WHERE name = ?", (name,)).rowcount > 0
+
+    def import_save_file(self, save_file, log_function=NULL_SINK):
+        """Copies a single-file save into the store unless its profile already exists.
+
+        Returns the imported profile name, or None.
+        """
+        if not os.path.exists(save_file):
+            return None
+        player = load_game(save_file, NULL_SINK)
+        if player is None or player.name in self:
+            return None
+        if self.save(player, NULL_SINK):
+            emit(log_function, Message(f"Imported {save_file} as profile {player.name}.", "system"))
+            return player.name
         return None
 
-def handle_death(player, log_function):
-    """Handles player death, applying persistence rules."""
-    log_function("You have been defeated!")
-    log_function("But your adventure doesn't end here...")
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+# --- Autosave ---
+
+AUTOSAVE_CHECKPOINTS = ("room", "combat", "timer") # Moments an AutosaveScheduler can save at
+AUTOSAVE_DEBOUNCE = 2.0 # Seconds; checkpoints closer together than this are batched into one save
+
+class _SaveErrorsOnly(EventSink):
+    """Passes save errors through to a log_function but not the success messages."""
+    def __init__(self, log_function):
+        self.log_function = log_function
+
+    def handle(self, event):
+        if event.message().startswith("Error"):
+            emit(self.log_function, event)
+
+class AutosaveScheduler:
+    """Saves the player at checkpoints, without ever blocking the caller on disk I/O.
+
+    Call checkpoint(player, "room") after each dungeon room and
+    checkpoint(player, "combat") when a fight ends; with an interval, poll()
+    (e.g. from a UI timer) also saves every `interval` seconds. Checkpoints
+    that come within `debounce` seconds of the last save are held back and
+    written by the next poll() or checkpoint after that, and nothing is
+    written while the player has no unsaved changes. Writes go through an
+    AsyncSaver; only save errors are logged.
+    """
+    def __init__(self, save_file, saver=None, checkpoints=("room", "combat"), interval=None,
+                 debounce=AUTOSAVE_DEBOUNCE, log_function=NULL_SINK, clock=time.monotonic):
+        unknown = set(checkpoints) - set(AUTOSAVE_CHECKPOINTS)
+        if unknown:
+            raise ValueError(f"Unknown autosave checkpoints: {sorted(unknown)}")
+        self.save_file = save_file
+        self.saver = saver or AsyncSaver()
+        self.checkpoints = set(checkpoints)
+        if interval:
+            self.checkpoints.add("timer")
+        self.interval = interval
+        self.debounce = debounce
+        self.log_function = _SaveErrorsOnly(log_function)
+        self.clock = clock
+        self.saves = 0 # Saves actually queued
+        self._player = None # Player seen at the latest checkpoint
+        self._pending = False
+        self._last_save = clock()
+
+    def checkpoint(self, player, reason):
+        """Reports a checkpoint; saves now or soon if reason is enabled. Returns True if it saved."""
+        if reason not in self.checkpoints:
+            return False
+        self._player = player
+        self._pending = True
+        return self.poll()
+
+    def poll(self):
+        """Writes a held-back or timer save when due. Cheap; call it often. Returns True if it saved."""
+        if self._player is None:
+            return False
+        now = self.clock()
+        if self.interval and now - self._last_save >= self.interval:
+            self._pending = True
+        if self._pending and now - self._last_save >= self.debounce:
+            return self._save(now)
+        return False
+
+    def flush(self):
+        """Saves any held-back checkpoint immediately (e.g. when returning to town or quitting)."""
+        if self._pending and self._player is not None:
+            self._save(self.clock())
+
+    def _save(self, now):
+        self._pending = False
+        self._last_save = now
+        if not self._player.is_dirty():
+            return False
+        self.saver.save(self._player, self.save_file, self.log_function)
+        self.saves += 1
+        return True
+
+def handle_death(player, log_function, rng=random, save_file=SAVE_FILE, saver=None):
+    """Handles player death, applying persistence rules.
+
+    The revived state is saved to save_file (a path or a ProfileStore);
+    pass None to skip saving (e.g. in headless simulations). With an
+    AsyncSaver the save happens in the background.
+    """
+    emit(log_function, PlayerDefeated())
 
     # Apply persistence rules
     player.gold = math.floor(player.gold / 2)
-    log_function(f"You kept half your gold: {player.gold} gold remaining.")
 
     kept_equipment = None
     all_equipment = list(player.equipped.values()) + player.inventory
@@ -291,7 +2220,7 @@ def handle_death(player, log_function):
     player.current_health = STARTING_HEALTH # Start fresh
 
     if equippable_items:
-        kept_equipment = random.choice(equippable_items)
+        kept_equipment = rng.choice(equippable_items)
         # Clear inventory and equipped items before adding the kept item
         player.inventory = []
         player.equipped = {"weapon": None, "armor": None, "accessory": None}
@@ -307,9 +2236,6 @@ def handle_death(player, log_function):
         else: # If kept item is a consumable, just add it to inventory
             player.inventory.append(kept_equipment)
 
-        log_function(f"You managed to keep one random piece of equipment: {kept_equipment.name}.")
-    else:
-        log_function("You had no equipment to keep.")
 
     # Calculate levels to keep, ensuring it's at least level 1
     levels_gained = player.level - 1
@@ -317,28 +2243,613 @@ def handle_death(player, log_function):
     player.level = 1 + levels_to_keep
     player.experience = 0 # Reset experience for current level
 
-    log_function(f"You kept half your gained levels. You are now Level {player.level}.")
+    emit(log_function, DeathPenalty(player.gold, kept_equipment.name if kept_equipment else None, player.level))
     player.current_health = player.max_health # Full heal for new start
 
-    save_game(player, "NotRouge_save.json", log_function) # Save the 'resurrected' state
-    log_function("You've been revived and returned to town!")
+    if save_file:
+        (saver.save if saver else save_game)(player, save_file, log_function) # Save the 'resurrected' state
+    emit(log_function, Message("You've been revived and returned to town!", "death"))
+
+
+# --- Game Session ---
+# The interactive flow (town, shop, dungeon, combat) as a state machine with
+# no UI, so a front end can run it on a worker thread and redraw only what
+# changed (see GameSession.changes()).
+
+SESSION_STATES = ("menu", "town", "shop", "dungeon", "combat")
+SESSION_COMMANDS = (
+    "new_game", "load_game", "save", "enter_town", "open_shop", "buy", "sell", "use_item", "discard",
+    "enter_dungeon", "next_room", "attack", "flee", "use_combat_item", "start_auto_attack",
+    "stop_auto_attack", "auto_attack_turn", "resolve_auto_attack",
+)
+SHOP_DISPLAY_SIZE = 5 # Shop items on offer per visit
+
+# Read-only views of the session for UIs; plain values, safe to pass between threads
+PlayerInfo = namedtuple("PlayerInfo", [
+    "name", "level", "experience", "exp_to_next", "current_health", "max_health", "attack", "defense", "gold",
+    "weapon", "armor", "accessory", # Names of the equipped items (None when empty)
+])
+EnemyInfo = namedtuple("EnemyInfo", ["name", "health", "health_full", "attack", "defense"])
+ItemInfo = namedtuple("ItemInfo", [
+    "name", "item_type", "cost", "attack_bonus", "defense_bonus", "health_bonus", "heal_amount",
+    "equipped", # True for inventory items that are also worn
+])
+
+class GameSession:
+    """One game as a state machine: menu, town, shop, dungeon and combat.
+
+    Each command (see SESSION_COMMANDS) reports what happened to
+    log_function; changes() then returns only the view fields that differ
+    since its last call, for a UI to redraw. Commands that don't fit the
+    current state are ignored, and items are picked by inventory index plus
+    name, so a command sent from a stale view never acts on the wrong item.
+    Saves go to save_file (a path or ProfileStore) in the background.
+    """
+    def __init__(self, save_file=SAVE_FILE, autosave=None, log_function=NULL_SINK, rng=random):
+        self.save_file = save_file
+        self.autosave = autosave or AutosaveScheduler(save_file, log_function=log_function)
+        self.saver = self.autosave.saver
+        self.log_function = log_function
+        self.rng = rng
+        self.player = None
+        self.state = "menu"
+        self.enemy = None
+        self.room = 0
+        self.rooms = 0
+        self.shop_stock = []
+        self.auto_attacking = False
+        self._published = {} # View as of the last changes()
+        self._inventory_key = None # (inventory, equipped) items behind _inventory_view
+        self._inventory_view = ()
+
+    def _log(self, text, category="general"):
+        emit(self.log_function, Message(text, category))
+
+    def _in(self, *states):
+        return self.player is not None and self.state in states
+
+    # --- Views ---
+
+    def _inventory(self):
+        player = self.player
+        if player is None:
+            return ()
+        key = (tuple(player.inventory), tuple(player.equipped.values()))
+        if key != self._inventory_key: # Items compare by identity, so this is cheap
+            worn = key[1]
+            self._inventory_view = tuple(ItemInfo(*_item_fields(item), any(item is gear for gear in worn))
+                                         for item in player.inventory)
+            self._inventory_key = key
+        return self._inventory_view
+
+    def view(self):
+        """The state a UI shows, as a dict of plain values."""
+        player, enemy = self.player, self.enemy
+        if player:
+            gear = player.equipped
+            player = PlayerInfo(player.name, player.level, player.experience, LEVEL_CURVE.exp_to_next(player.level),
+                                player.current_health, player.max_health, player.attack, player.defense, player.gold,
+                                *(gear[slot].name if gear.get(slot) else None for slot in ("weapon", "armor", "accessory")))
+        return {
+            "state": self.state,
+            "auto_attacking": self.auto_attacking,
+            "room": (self.room, self.rooms),
+            "player": player,
+            "enemy": enemy and EnemyInfo(enemy.name, enemy.health, enemy.health_full, enemy.attack, enemy.defense),
+            "inventory": self._inventory(),
+            "shop": tuple(ItemInfo(*_item_fields(item), False) for item in self.shop_stock),
+        }
+
+    def changes(self):
+        """Returns {field: value} for the view fields changed since the last call (all of them at first)."""
+        view = self.view()
+        published = self._published
+        changed = {key: value for key, value in view.items() if key not in published or published[key] != value}
+        self._published = view
+        return changed
+
+    def _inventory_item(self, index, name):
+        """The inventory item a UI picked, or None if its view was out of date."""
+        inventory = self.player.inventory
+        if 0 <= index < len(inventory) and inventory[index].name == name:
+            return inventory[index]
+        self._log(f"{name} is no longer in your inventory.")
+        return None
+
+    # --- Menu and Town ---
+
+    def new_game(self, name):
+        self.player = Player(name)
+        self._log(f"Welcome, {name}!")
+        self._go_to_town()
+
+    def saved_heroes(self):
+        """[(name, level, gold)] of every saved hero, most recent first (empty unless saving to a ProfileStore).
+
+        Waits for saves still being written and imports a single-file save
+        from older versions first, so a menu built from it is complete.
+        """
+        if not isinstance(self.save_file, ProfileStore):
+            return []
+        self.saver.flush()
+        self.save_file.import_save_file(SAVE_FILE, self.log_function)
+        return self.save_file.list_profiles()
+
+    def load_game(self, name=None):
+        """Loads a game (name picks the profile in a ProfileStore). Returns True if one was loaded."""
+        self.saver.flush() # Make sure a save still being written is the one we load
+        player = load_game(self.save_file, self.log_function, name)
+        if player is None:
+            self._log("No saved game found. Please start a new game.")
+            return False
+        self.player = player
+        self._log("Game loaded. Returning to town.")
+        self._go_to_town()
+        return True
+
+    def save(self):
+        if self.player:
+            self.saver.save(self.player, self.save_file, self.log_function)
+        else:
+            self._log("No game in progress to save.")
+
+    def enter_town(self):
+        """Returns to town from the shop or between dungeon rooms."""
+        if self._in("town", "shop", "dungeon"):
+            self._go_to_town()
+
+    def _go_to_town(self):
+        self.autosave.flush() # Write any checkpoint held back in the dungeon
+        self.auto_attacking = False
+        self.enemy = None
+        self.shop_stock = []
+        self.state = "town"
+
+    def use_item(self, index, name):
+        """Uses a consumable or equips gear from the inventory."""
+        if not self._in("town"):
+            return
+        item = self._inventory_item(index, name)
+        if item is None:
+            return
+        if item.item_type == "consumable":
+            if item.heal_amount > 0:
+                self.player.heal(item.heal_amount, self.log_function)
+                self.player.inventory.remove(item)
+                self._log(f"You used a {item.name}.", "item")
+            else:
+                self._log("This item cannot be used.")
+        else: # Equipable item
+            self.player.equip_item(item, self.log_function)
+            self._log(f"You equipped {item.name}.", "item")
+
+    def discard(self, index, name):
+        if not self._in("town"):
+            return
+        item = self._inventory_item(index, name)
+        if item is None:
+            return
+        if item in self.player.equipped.values(): # Prevent throwing away equipped items directly
+            self._log(f"You cannot throw away {item.name} while it is equipped. Unequip it first.")
+            return
+        self.player.inventory.remove(item)
+        self._log(f"You threw away {item.name}.", "item")
+
+    # --- Shop ---
+
+    def open_shop(self):
+        """Enters the shop with a fresh selection of items on offer."""
+        if not self._in("town", "shop"):
+            return
+        items = get_shop_items()
+        self.shop_stock = self.rng.sample(items, min(SHOP_DISPLAY_SIZE, len(items)))
+        self.state = "shop"
+
+    def buy(self, index, name):
+        if not self._in("shop"):
+            return
+        if not (0 <= index < len(self.shop_stock) and self.shop_stock[index].name == name):
+            self._log(f"{name} is no longer on offer.")
+            return
+        if buy_item(self.player, self.shop_stock[index], self.log_function):
+            self.open_shop() # Restock
+
+    def sell(self, index, name):
+        if not self._in("shop"):
+            return
+        item = self._inventory_item(index, name)
+        if item is None:
+            return
+        if item in self.player.equipped.values():
+            self._log(f"You cannot sell {item.name} while it is equipped.")
+            return
+        sell_item(self.player, item, self.log_function)
+
+    # --- Dungeon ---
+
+    def enter_dungeon(self):
+        if not self._in("town"):
+            return
+        if not get_dungeon_enemies():
+            self._log("The dungeon seems eerily quiet... (No enemies loaded).")
+            return
+        self._log("You enter the dark and winding dungeon...")
+        self.room = 0
+        self.rooms = self.rng.randint(3, 7)
+        self.state = "dungeon"
+        self.next_room()
+
+    def next_room(self):
+        if not self._in("dungeon"):
+            return
+        player, rng = self.player, self.rng
+        if player.current_health <= 0:
+            self._die()
+            return
+        if self.room >= self.rooms:
+            self._log("You have cleared this section of the dungeon! You return to town.")
+            self._go_to_town()
+            return
+
+        self.room += 1
+        self._log(f"\n--- Dungeon Depth: {self.room}/{self.rooms} ---")
+        self._log("You explore deeper...")
+        encounter_type = rng.choices(DUNGEON_ENCOUNTER_TYPES, weights=DUNGEON_ENCOUNTER_WEIGHTS, k=1)[0]
+
+        if encounter_type == "combat":
+            self.enemy = rng.choice(get_dungeon_enemies()).spawn() # Fresh health, shared stats
+            self._log(f"A wild {self.enemy.name} appears!", "combat")
+            self.state = "combat"
+            self._combat_header()
+            return
+        if encounter_type == "treasure":
+            gold_found = rng.randint(20, 100)
+            player.gold += gold_found
+            self._log(f"You found a hidden chest with {gold_found} gold!", "loot")
+        elif encounter_type == "healing":
+            heal_amount = rng.randint(20, 60)
+            player.heal(heal_amount, self.log_function)
+            self._log(f"You found a refreshing spring and healed {heal_amount} health!")
+        else: # "nothing"
+            self._log("You found nothing of interest in this area.")
+        self._room_done()
+
+    def _room_done(self):
+        self.autosave.checkpoint(self.player, "room") # Every room ends here, including won or fled fights
+        self.state = "dungeon"
+
+    # --- Combat ---
+
+    def _combat_header(self):
+        player, enemy = self.player, self.enemy
+        self._log(f"--- Combat: {player.name} vs {enemy.name} ---", "combat")
+        self._log(f"{player.name} HP: {player.current_health}/{player.max_health} | ATK: {player.attack} | DEF: {player.defense}", "combat")
+        self._log(f"{enemy.name} HP: {enemy.health}/{enemy.health_full} | ATK: {enemy.attack} | DEF: {enemy.defense}", "combat")
+        self._log("What will you do?", "combat")
 
+    def _player_attack(self):
+        enemy = self.enemy
+        player_damage = roll_player_damage(self.player, self.rng)
+        enemy_dead = enemy.take_damage(player_damage, self.log_function)
+        self._log(f"You hit the {enemy.name} for {player_damage} damage!", "combat")
+        if enemy_dead:
+            award_victory(self.player, enemy, self.log_function) # Same rewards as every other combat loop
+            self._log(f"You gained {enemy.gold_drop} gold and {enemy.exp_drop} experience.", "loot")
+            self.enemy = None # Mark enemy as defeated
 
-# These global lists will be populated when the module is imported
-# The UI launchers will import these populated lists
-SHOP_ITEMS = []
-DUNGEON_ENEMIES = []
+    def _enemy_attack(self):
+        enemy = self.enemy
+        if enemy is None:
+            return
+        enemy_damage = roll_enemy_damage(enemy, self.rng)
+        player_dead = self.player.take_damage(enemy_damage, self.log_function)
+        self._log(f"The {enemy.name} hits you for {enemy_damage} damage!", "combat")
+        if player_dead:
+            self.enemy = None # Player died, combat ends
 
-# Self-initialize when the module is loaded
-# This is a basic logger for initial loading messages if module is imported directly
+    def _check_combat_end(self):
+        player, enemy = self.player, self.enemy
+        if player.current_health <= 0:
+            self._die()
+        elif enemy is None: # Enemy defeated (or fled from)
+            self._win()
+        else:
+            self._log(f"--- Combat: {player.name} HP: {player.current_health}/{player.max_health} vs {enemy.name} HP: {enemy.health}/{enemy.health_full} ---", "combat")
+            self._log("What will you do next?", "combat")
+
+    def _win(self):
+        self.auto_attacking = False
+        self.enemy = None
+        self.autosave.checkpoint(self.player, "combat")
+        self._room_done() # Back to dungeon flow
+
+    def _die(self):
+        self.auto_attacking = False
+        self.enemy = None
+        handle_death(self.player, self.log_function, self.rng, self.save_file, self.saver)
+        self._go_to_town()
+
+    def attack(self):
+        if not self._in("combat"):
+            return
+        self.auto_attacking = False # A manual action stops auto-attack
+        self._player_attack()
+        self._enemy_attack()
+        self._check_combat_end()
+
+    def flee(self):
+        if not self._in("combat"):
+            return
+        self.auto_attacking = False
+        if self.rng.random() < 0.5:
+            self._log("You successfully fled from combat!", "combat")
+            self.enemy = None # End combat
+        else:
+            self._log("You failed to flee!", "combat")
+            self._enemy_attack() # Enemy gets a free hit if flee fails
+        self._check_combat_end()
+
+    def use_combat_item(self, index, name):
+        if not self._in("combat"):
+            return
+        self.auto_attacking = False
+        item = self._inventory_item(index, name)
+        if item is None:
+            return
+        if item.item_type == "consumable" and item.heal_amount > 0:
+            self.player.heal(item.heal_amount, self.log_function)
+            self.player.inventory.remove(item)
+            self._log(f"You used a {item.name}.", "item")
+        else:
+            self._log("This item cannot be used.")
+        self._combat_header()
+
+    def start_auto_attack(self):
+        """Starts auto-attack and plays its first turn; the UI calls auto_attack_turn() for the rest."""
+        if not self._in("combat"):
+            return
+        self._log("Initiating auto-attack...", "combat")
+        self.auto_attacking = True
+        self.auto_attack_turn()
+
+    def stop_auto_attack(self):
+        self.auto_attacking = False
+
+    def resolve_auto_attack(self):
+        """Plays the rest of the fight as auto-attack in one go (see resolve_auto_combat) and logs it condensed."""
+        if not self._in("combat"):
+            return
+        self.auto_attacking = False
+        enemy = self.enemy
+        awards = EventRecorder() # Victory and level-up events, logged after the fight itself
+        result = resolve_auto_combat(self.player, enemy, awards, self.rng, condensed_log=bool(self.log_function))
+        self._log("Auto-attack resolved instantly:", "combat")
+        for line in result.log or ():
+            self._log(line, "combat")
+        self._log(result.summary(enemy.name), "combat")
+        for event in awards.events:
+            emit(self.log_function, event)
+        if result.outcome == "won":
+            self._win()
+        elif result.outcome == "died":
+            self._die()
+        else:
+            if result.outcome == "stalemate":
+                self._log("Neither of you can get through the other's defense. Auto-attack stopped.", "combat")
+            else:
+                self._log("\nYour health is critically low (1 HP remaining)! Auto-attack stopped.", "combat")
+            self._combat_header() # Back to manual combat options
+
+    def auto_attack_turn(self):
+        """Plays one auto-attack turn. Returns True while auto-attack should go on."""
+        if not (self.auto_attacking and self._in("combat")):
+            return False
+        player = self.player
+        if player.current_health <= 1: # Never let auto-attack take the last hit point
+            self._log("\nYour health is critically low (1 HP remaining)! Auto-attack stopped.", "combat")
+            self.auto_attacking = False
+            self._combat_header() # Back to manual combat options
+            return False
+
+        self._player_attack()
+        if self.enemy is None:
+            self._win()
+            return False
+
+        self._enemy_attack()
+        if player.current_health <= 0:
+            self._die()
+            return False
+
+        enemy = self.enemy
+        self._log(f"--- Auto-Combat: {player.name} HP: {player.current_health}/{player.max_health} vs {enemy.name} HP: {enemy.health}/{enemy.health_full} ---", "combat")
+        return True
+
+
+# --- Content Packs ---
+
+def _file_signature(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+def _merge_by_name(layers):
+    """Merges record lists in order; a later record replaces an earlier one with the same name."""
+    merged = {}
+    for records in layers:
+        for record in records:
+            merged[record.name] = record # Dicts keep the first position of a name
+    return list(merged.values())
+
+class ContentPack:
+    """Layers several item and enemy files (or directories of .txt files).
+
+    A layer is a file, a directory, or (directory, keyword) for just the
+    .txt files with keyword in their name. Directories are rescanned on
+    every poll, so files added later are picked up. Later layers override
+    earlier entries with the same name. poll() checks file signatures and
+    reparses only files that changed, appeared or disappeared, which makes
+    live reloading cheap.
+    """
+    def __init__(self, item_paths=None, enemy_paths=None, use_cache=True):
+        self.item_paths = list(item_paths) if item_paths else [DEFAULT_ITEMS_FILE]
+        self.enemy_paths = list(enemy_paths) if enemy_paths else [DEFAULT_ENEMIES_FILE]
+        self.use_cache = use_cache
+        self._files = {} # path -> (signature, records)
+        self.items = []
+        self.enemies = []
+
+    @classmethod
+    def from_directory(cls, directory, base=True, use_cache=True):
+        """A pack from one directory: files with "item" in the name are items, "enem" enemies.
+
+        With base=True the default content files are layered underneath.
+        The directory is rescanned on every poll, so new files take effect too.
+        """
+        if not os.path.isdir(directory):
+            raise FileNotFoundError(f"Content pack directory not found: {directory}")
+        item_paths = [(directory, "item")]
+        enemy_paths = [(directory, "enem")]
+        if base:
+            item_paths.insert(0, DEFAULT_ITEMS_FILE)
+            enemy_paths.insert(0, DEFAULT_ENEMIES_FILE)
+        return cls(item_paths, enemy_paths, use_cache)
+
+    @staticmethod
+    def _expand(paths):
+        """Files for a list of layers; a directory contributes its .txt files in name order."""
+        files = []
+        for path in paths:
+            directory, keyword = path if isinstance(path, tuple) else (path, "")
+            if os.path.isdir(directory):
+                try:
+                    names = sorted(os.listdir(directory))
+                except OSError:
+                    continue
+                files.extend(os.path.join(directory, name) for name in names
+                             if name.endswith(".txt") and keyword in name.lower())
+            elif not keyword:
+                files.append(path)
+        return files
+
+    def _layers(self, paths, loader, log_function):
+        layers = []
+        changed = False
+        for path in self._expand(paths):
+            signature = _file_signature(path)
+            cached = self._files.get(path)
+            if cached is None or cached[0] != signature:
+                records = loader(path, log_function) if signature else []
+                if not signature:
+                    emit(log_function, Message(f"Error: {path} not found. Skipping this content layer.", "system"))
+                self._files[path] = (signature, records)
+                changed = True
+            layers.append(self._files[path][1])
+        return layers, changed
+
+    def poll(self, log_function=NULL_SINK):
+        """Reloads changed files and re-merges. Returns True if the content changed."""
+        item_loader = load_items_cached if self.use_cache else load_items_from_file
+        enemy_loader = load_enemies_cached if self.use_cache else load_enemies_from_file
+        known = set(self._files)
+        item_layers, items_changed = self._layers(self.item_paths, item_loader, log_function)
+        enemy_layers, enemies_changed = self._layers(self.enemy_paths, enemy_loader, log_function)
+        current = set(self._expand(self.item_paths)) | set(self._expand(self.enemy_paths))
+        removed = known - current
+        for path in removed:
+            del self._files[path]
+        if items_changed or removed or not self.items:
+            self.items = _merge_by_name(item_layers)
+        if enemies_changed or removed or not self.enemies:
+            self.enemies = _merge_by_name(enemy_layers)
+        return bool(items_changed or enemies_changed or removed)
+
+    def load(self, log_function=NULL_SINK):
+        """Loads every layer; returns (items, enemies)."""
+        self.poll(log_function)
+        return self.items, self.enemies
+
+# --- Content Loading ---
+# SHOP_ITEMS, DUNGEON_ENEMIES and CATALOG are loaded on first access (see
+# __getattr__ below), so importing this module never touches the data files.
+# Call load_content() to load explicitly, e.g. from other paths or quietly,
+# or load_content_pack() to layer several files with hot reloading.
+
+DEFAULT_ITEMS_FILE = os.path.join(os.path.dirname(__file__), "NotRouge_Items.txt")
+DEFAULT_ENEMIES_FILE = os.path.join(os.path.dirname(__file__), "NotRouge_Enemies.txt")
+_CONTENT_NAMES = ("SHOP_ITEMS", "DUNGEON_ENEMIES", "CATALOG")
+
+# This is a basic logger for loading messages when content is loaded implicitly
 def _default_logger(message):
     print(f"[CORE_INIT] {message}")
 
-# Load data on module import
-# These paths are relative to where the script executing the import is run.
-# For consistency, it's assumed items.txt and enemies.txt are in the same directory as NotRouge_game_core.py or the main launcher.
-_items_path = os.path.join(os.path.dirname(__file__), "NotRouge_Items.txt")
-_enemies_path = os.path.join(os.path.dirname(__file__), "NotRouge_Enemies.txt")
+def set_content(items, enemies):
+    """Installs item and enemy lists as the game content (and rebuilds CATALOG)."""
+    global SHOP_ITEMS, DUNGEON_ENEMIES, CATALOG
+    SHOP_ITEMS = items
+    DUNGEON_ENEMIES = enemies
+    CATALOG = ContentCatalog(items, enemies)
+
+ACTIVE_CONTENT_PACK = None # The ContentPack behind the installed content, if any
+
+def load_content_pack(pack, log_function=_default_logger):
+    """Loads a ContentPack and installs it as the game content. Returns (items, enemies)."""
+    global ACTIVE_CONTENT_PACK
+    items, enemies = pack.load(log_function)
+    ACTIVE_CONTENT_PACK = pack
+    set_content(items, enemies)
+    return items, enemies
+
+def load_content(items_file=None, enemies_file=None, log_function=_default_logger, use_cache=True):
+    """Loads the game content from the given files (default: next to this module).
+
+    Either argument may also be a directory or a list of layers (see
+    ContentPack). Returns (items, enemies). use_cache=False skips the
+    compiled cache.
+    """
+    def layers(paths):
+        return [paths] if isinstance(paths, str) else paths
+    return load_content_pack(ContentPack(layers(items_file), layers(enemies_file), use_cache), log_function)
+
+def reload_changed_content(log_function=NULL_SINK):
+    """Hot-reloads the active content pack, reparsing only changed files.
+
+    Installs and returns True if anything changed. Cheap enough to call
+    every second or on every menu transition.
+    """
+    if ACTIVE_CONTENT_PACK is None or not ACTIVE_CONTENT_PACK.poll(log_function):
+        return False
+    set_content(ACTIVE_CONTENT_PACK.items, ACTIVE_CONTENT_PACK.enemies)
+    emit(log_function, Message(f"Content reloaded: {len(SHOP_ITEMS)} items, {len(DUNGEON_ENEMIES)} enemies.", "system"))
+    return True
+
+def content_loaded():
+    """True once content has been loaded or installed."""
+    return "CATALOG" in globals()
+
+def get_shop_items():
+    """The loaded shop items, loading the default content on first use."""
+    if not content_loaded():
+        load_content()
+    return SHOP_ITEMS
+
+def get_catalog():
+    """The content catalog, loading the default content on first use."""
+    if not content_loaded():
+        load_content()
+    return CATALOG
+
+def get_dungeon_enemies():
+    """The loaded enemy templates, loading the default content on first use."""
+    if not content_loaded():
+        load_content()
+    return DUNGEON_ENEMIES
 
-SHOP_ITEMS = load_items_from_file(_items_path, _default_logger)
-DUNGEON_ENEMIES = load_enemies_from_file(_enemies_path, _default_logger)
+def __getattr__(name):
+    """Loads the default content the first time a content global is read."""
+    if name in _CONTENT_NAMES:
+        load_content()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,24 +1,230 @@
 import os
-import random
+import sys
 import time
-import math
+from array import array
+from collections import deque
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout,
-    QHBoxLayout, QPushButton, QLabel, QTextEdit, QLineEdit,
-    QInputDialog, QMessageBox
+    QHBoxLayout, QPushButton, QLabel, QLineEdit,
+    QInputDialog, QMessageBox, QTableView, QHeaderView, QComboBox, QAbstractItemView
 )
-from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtCore import Qt, QObject, QTimer, QThread, pyqtSignal, QAbstractListModel, QModelIndex
 
 import NotRouge_game_core # Import the core game logic
 
 # --- Game Constants (Launcher Specific) ---
-SAVE_FILE = "NotRouge_save.json"
-# ITEMS_FILE and ENEMIES_FILE are implicitly used by NotRouge_game_core's internal loading
-# so they are not directly used here for file loading.
+CONTENT_POLL_INTERVAL = 1000 # Milliseconds between checks for edited content files
+AUTOSAVE_INTERVAL = 60 # Seconds between timed autosaves (room and combat checkpoints also save)
+AUTOSAVE_POLL_INTERVAL = 500 # Milliseconds between checks for due autosaves
+AUTO_ATTACK_INTERVAL = 100 # Milliseconds between auto-attack turns
+LOG_FLUSH_INTERVAL = 16 # Milliseconds; queued log lines are drawn at most once per frame
+LOG_HISTORY_LIMIT = 2000000 # Lines kept in the game log; the oldest tenth is dropped when it's full
+LOG_ROW_HEIGHT = 20 # Pixels per game log line (fits the 14px log font)
+# Game log filter choices: label -> event categories shown (None shows everything)
+LOG_FILTERS = (
+    ("All Messages", None),
+    ("Combat", ("combat", "death")),
+    ("Loot", ("loot",)),
+    ("Level Ups", ("level",)),
+    ("Items", ("item",)),
+    ("System", ("system",)),
+)
+# Items and enemies are loaded through NotRouge_game_core.load_content()
+# (NotRouge_game_core.DEFAULT_ITEMS_FILE / DEFAULT_ENEMIES_FILE).
+
+
+# --- Game Log ---
+
+class GameLogModel(QAbstractListModel):
+    """The game log as a list model, so the view only ever draws the visible rows.
+
+    Lines are stored back to back as UTF-8 in one bytearray, with an array
+    of end offsets and one category byte per line, which keeps millions of
+    lines cheap. A filter shows only lines of some categories.
+    """
+    CATEGORIES = ("general", "combat", "loot", "level", "item", "death", "system")
+
+    def __init__(self, limit=LOG_HISTORY_LIMIT, parent=None):
+        super().__init__(parent)
+        self.limit = limit
+        self._codes = {category: code for code, category in enumerate(self.CATEGORIES)}
+        self._text = bytearray()
+        self._ends = array("Q") # End offset of each line in _text
+        self._categories = bytearray() # Category code of each line
+        self._shown = None # Codes shown by the filter (None: all)
+        self._rows = None # Line numbers of the shown rows when filtering
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._rows) if self._rows is not None else len(self._ends)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        line = self._rows[index.row()] if self._rows is not None else index.row()
+        return self.line(line)
+
+    def line(self, number):
+        """Text of a stored line (unfiltered numbering)."""
+        start = self._ends[number - 1] if number else 0
+        return self._text[start:self._ends[number]].decode("utf-8")
+
+    def append_lines(self, entries):
+        """Adds (message, category) entries; messages with newlines become several lines."""
+        first_line = len(self._ends)
+        first_row = self.rowCount()
+        end = len(self._text)
+        added_text = bytearray()
+        added_ends = array("Q")
+        added_categories = bytearray()
+        for message, category in entries:
+            code = self._codes.get(category, 0)
+            for line in message.split("\n"):
+                encoded = line.encode("utf-8")
+                added_text += encoded
+                end += len(encoded)
+                added_ends.append(end)
+                added_categories.append(code)
+        if not added_ends:
+            return
+        if self._rows is None:
+            shown = len(added_ends)
+        else:
+            new_rows = [first_line + i for i, code in enumerate(added_categories) if code in self._shown]
+            shown = len(new_rows)
+        if shown:
+            self.beginInsertRows(QModelIndex(), first_row, first_row + shown - 1)
+        self._text += added_text
+        self._ends.extend(added_ends)
+        self._categories += added_categories
+        if self._rows is not None:
+            self._rows.extend(new_rows)
+        if shown:
+            self.endInsertRows()
+        if len(self._ends) > self.limit:
+            self._drop_oldest(len(self._ends) - self.limit * 9 // 10)
+
+    def _drop_oldest(self, count):
+        self.beginResetModel()
+        cut = self._ends[count - 1]
+        del self._text[:cut]
+        self._ends = array("Q", (end - cut for end in self._ends[count:]))
+        del self._categories[:count]
+        self._rows = self._filtered_rows()
+        self.endResetModel()
+
+    def _filtered_rows(self):
+        if self._shown is None:
+            return None
+        return array("L", (i for i, code in enumerate(self._categories) if code in self._shown))
+
+    def set_filter(self, categories):
+        """Shows only lines of the given categories (None shows everything)."""
+        self.beginResetModel()
+        self._shown = None if categories is None else {self._codes[category] for category in categories}
+        self._rows = self._filtered_rows()
+        self.endResetModel()
+
+    def text(self):
+        """The shown lines as plain text."""
+        return "\n".join(self.data(self.index(row)) for row in range(self.rowCount()))
+
+class GameLogSink(NotRouge_game_core.EventSink):
+    """Passes core events to the game log along with their category, for filtering."""
+    def __init__(self, window):
+        self.window = window
+
+    def handle(self, event):
+        for line in event.lines():
+            self.window.update_game_log(line, event.category)
+
+
+# --- Session Worker ---
+
+class SessionWorker(QObject):
+    """Runs a GameSession on its own thread so game logic never blocks the window.
+
+    GameWindow sends commands with its session_command signal (queued to
+    this thread), and after every command or auto-attack turn the changed
+    view fields come back through state_changed. Content loading, hot
+    reload and the saved-hero list (which waits for pending saves) also run
+    here, so the window never touches the disk. Log lines reach the window
+    through its thread-safe update_game_log.
+    """
+    state_changed = pyqtSignal(object) # dict of changed GameSession.view() fields
+    heroes_listed = pyqtSignal(str, object) # (purpose, [(name, level, gold)]) answering list_heroes
+
+    def __init__(self, session, content_pack=None):
+        super().__init__()
+        self.session = session
+        self.content_pack = content_pack
+
+    def start(self):
+        """Loads the game content, creates the worker's timers (on the worker thread) and publishes the first state."""
+        log_function = self.session.log_function
+        # Load the core game data now so any problems show up in the game log
+        if self.content_pack:
+            NotRouge_game_core.load_content_pack(self.content_pack, log_function)
+        else:
+            NotRouge_game_core.load_content(log_function=log_function)
+        NotRouge_game_core.emit(log_function, NotRouge_game_core.Message("Core game data (items, enemies) loaded."))
+        self.auto_attack_timer = QTimer(self)
+        self.auto_attack_timer.timeout.connect(self._auto_attack_turn)
+        self.autosave_timer = QTimer(self)
+        self.autosave_timer.timeout.connect(self.session.autosave.poll)
+        self.autosave_timer.start(AUTOSAVE_POLL_INTERVAL)
+        # Hot reload: edited content files take effect without restarting
+        self.content_timer = QTimer(self)
+        self.content_timer.timeout.connect(self._reload_content)
+        self.content_timer.start(CONTENT_POLL_INTERVAL)
+        self._publish()
+
+    def execute(self, command, args):
+        """Runs one GameSession command and publishes what it changed."""
+        try:
+            if command not in NotRouge_game_core.SESSION_COMMANDS:
+                raise ValueError(f"unknown command {command!r}")
+            getattr(self.session, command)(*args)
+        except Exception as e:
+            NotRouge_game_core.emit(self.session.log_function, NotRouge_game_core.Message(f"Error: {e}", "system"))
+        if self.session.auto_attacking and not self.auto_attack_timer.isActive():
+            self.auto_attack_timer.start(AUTO_ATTACK_INTERVAL)
+        self._publish()
+
+    def list_heroes(self, purpose):
+        """Sends the saved heroes back through heroes_listed, tagged with purpose."""
+        self.heroes_listed.emit(purpose, self.session.saved_heroes())
+
+    def stop(self):
+        """Stops the worker's timers and then its thread (runs on the worker thread)."""
+        self.auto_attack_timer.stop()
+        self.autosave_timer.stop()
+        self.content_timer.stop()
+        self.thread().quit()
+
+    def _reload_content(self):
+        """Reloads content files that changed on disk (only those files are reparsed)."""
+        NotRouge_game_core.reload_changed_content(self.session.log_function)
+
+    def _auto_attack_turn(self):
+        if not self.session.auto_attack_turn():
+            self.auto_attack_timer.stop()
+        self._publish()
+
+    def _publish(self):
+        changes = self.session.changes()
+        if changes:
+            self.state_changed.emit(changes)
 
 
 class GameWindow(QMainWindow):
-    def __init__(self):
+    log_message = pyqtSignal(str, str) # Carries log lines (and categories) from worker threads to the GUI thread
+    session_command = pyqtSignal(str, object) # (GameSession command, args tuple), queued to the worker thread
+    session_stop = pyqtSignal() # Asks the worker to finish its queued commands and stop
+    session_list_heroes = pyqtSignal(str) # Asks the worker for the saved heroes ("load" or "new_game")
+
+    def __init__(self, content_pack=None):
         super().__init__()
         self.setWindowTitle("NotRouge by Gobytego GUI") # Updated window title
         self.setGeometry(100, 100, 1000, 700) # Increased window size for split view
@@ -26,16 +232,34 @@ class GameWindow(QMainWindow):
         # Set the main window background color to dark purple
         self.setStyleSheet("background-color: #330033;") # Dark purple color
 
-        self.player = None
-        self.current_enemy = None
-        self.auto_attack_timer = QTimer(self)
-        self.auto_attack_timer.timeout.connect(self._auto_attack_turn)
+        self.view = {} # Latest GameSession.view(), merged from the worker's diffs
+        self.shown_state = None # Session state the buttons were last drawn for
+        self.screen = None # Menu on screen: main_menu, town, shop, sell, inventory, dungeon, combat, combat_items
+        self.log_message.connect(self.update_game_log)
+        self.log_events = GameLogSink(self) # log_function for core calls; keeps event categories
+        # Log lines are queued and drawn together once per frame (see update_game_log)
+        self._log_buffer = deque(maxlen=LOG_HISTORY_LIMIT) # (message, category); never more than the log keeps
+        self.log_flush_timer = QTimer(self)
+        self.log_flush_timer.setSingleShot(True)
+        self.log_flush_timer.timeout.connect(self._flush_game_log)
+        self.saver = NotRouge_game_core.AsyncSaver() # Saves are written on a background thread
+        self.profiles = NotRouge_game_core.ProfileStore() # Every saved hero, by name (NotRouge_game_core.PROFILE_DB)
+        autosave = NotRouge_game_core.AutosaveScheduler(self.profiles, self.saver, interval=AUTOSAVE_INTERVAL,
+                                                        log_function=self.log_events)
+        # The game itself runs on a worker thread; see SessionWorker
+        self.worker = SessionWorker(NotRouge_game_core.GameSession(self.profiles, autosave, self.log_events),
+                                    content_pack)
+        self.session_thread = QThread(self)
+        self.worker.moveToThread(self.session_thread)
+        self.session_thread.started.connect(self.worker.start)
+        self.session_command.connect(self.worker.execute)
+        self.session_stop.connect(self.worker.stop)
+        self.session_list_heroes.connect(self.worker.list_heroes)
+        self.worker.state_changed.connect(self._apply_state)
+        self.worker.heroes_listed.connect(self._heroes_listed)
 
         self._setup_ui()
-        # NotRouge_game_core automatically loads data when imported,
-        # but we can log that it has happened.
-        self.update_game_log("Core game data (items, enemies) loaded.")
-        self.show_main_menu()
+        self.session_thread.start() # Loads the game content; its first state diff shows the main menu
 
     def _setup_ui(self):
         central_widget = QWidget()
@@ -67,8 +291,26 @@ class GameWindow(QMainWindow):
         game_interaction_v_layout = QVBoxLayout(game_interaction_panel)
         game_interaction_v_layout.setContentsMargins(10, 10, 10, 10) # Add some inner padding
 
-        self.game_log = QTextEdit()
-        self.game_log.setReadOnly(True)
+        self.log_filter = QComboBox()
+        self.log_filter.addItems([label for label, categories in LOG_FILTERS])
+        self.log_filter.setStyleSheet("color: white;")
+        self.log_filter.currentIndexChanged.connect(lambda index: self.game_log_model.set_filter(LOG_FILTERS[index][1]))
+        game_interaction_v_layout.addWidget(self.log_filter)
+
+        # Model/view log: only the visible rows are ever drawn. A one-column
+        # table is used because, with fixed row heights, it never walks every
+        # row on layout the way QListView and QTreeView do.
+        self.game_log_model = GameLogModel(parent=self)
+        self.game_log = QTableView()
+        self.game_log.setModel(self.game_log_model)
+        self.game_log.setShowGrid(False)
+        self.game_log.setWordWrap(False)
+        self.game_log.horizontalHeader().hide()
+        self.game_log.horizontalHeader().setStretchLastSection(True)
+        self.game_log.verticalHeader().hide()
+        self.game_log.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.game_log.verticalHeader().setDefaultSectionSize(LOG_ROW_HEIGHT)
+        self.game_log.setSelectionBehavior(QAbstractItemView.SelectRows)
         self.game_log.setStyleSheet("background-color: black; color: green; font-family: 'Consolas', 'Monospace'; font-size: 14px; padding: 5px;")
         game_interaction_v_layout.addWidget(self.game_log, 1) # Game log takes available vertical space in this panel
 
@@ -81,13 +323,16 @@ class GameWindow(QMainWindow):
 
         # Define buttons
         self.buttons = {}
+        self._dynamic_buttons = [] # Pool for menu buttons, see _add_dynamic_button
+        self._dynamic_handlers = [] # Current click handler of each pooled button
+        self._dynamic_buttons_used = 0
         # Main Menu Buttons
         self._create_button("New Game", self._handle_new_game, "main_menu")
         self._create_button("Load Game", self._handle_load_game, "main_menu")
         self._create_button("Exit", self.close, "main_menu")
         # Town Buttons
-        self._create_button("Visit Shop", lambda: self.show_shop_menu(display_items=True), "town")
-        self._create_button("Enter Dungeon", self._start_dungeon, "town")
+        self._create_button("Visit Shop", lambda: self._send("open_shop"), "town")
+        self._create_button("Enter Dungeon", lambda: self._send("enter_dungeon"), "town")
         self._create_button("Inventory", self.show_inventory_menu, "town")
         self._create_button("Save Game", self._save_current_game, "town")
         self._create_button("Exit Game", self.close, "town")
@@ -96,10 +341,34 @@ class GameWindow(QMainWindow):
         self._create_button("Use Item", lambda: self._combat_action("use_item"), "combat")
         self._create_button("Flee", lambda: self._combat_action("flee"), "combat")
         self._create_button("Auto-Attack", lambda: self._combat_action("auto_attack"), "combat")
+        self._create_button("Resolve Instantly", lambda: self._combat_action("resolve"), "combat")
         # Shop/Inventory dynamic buttons will be created as needed
 
         self.set_button_visibility("none") # Hide all buttons initially
 
+    def _add_dynamic_button(self, text, handler):
+        """Shows the next pooled button with a new label and click handler.
+
+        Menu buttons (shop items, inventory actions, Back...) come from a pool
+        that only grows: buttons are relabelled and rebound instead of being
+        created, styled and deleted on every menu change.
+        """
+        index = self._dynamic_buttons_used
+        if index == len(self._dynamic_buttons):
+            button = QPushButton()
+            button.clicked.connect(lambda _, i=index: self._dynamic_handlers[i]()) # Dispatch to the current handler
+            button.setStyleSheet("color: white;") # Set button text color to white
+            self.button_layout.addWidget(button)
+            self._dynamic_buttons.append(button)
+            self._dynamic_handlers.append(None)
+        button = self._dynamic_buttons[index]
+        if button.text() != text:
+            button.setText(text)
+        self._dynamic_handlers[index] = handler
+        button.show()
+        self._dynamic_buttons_used += 1
+        return button
+
     def _create_button(self, text, handler, group):
         button = QPushButton(text)
         button.clicked.connect(handler)
@@ -117,29 +386,69 @@ class GameWindow(QMainWindow):
             else:
                 button.hide()
                 button.setEnabled(False)
-        # Clear dynamically added buttons
-        for i in reversed(range(self.button_layout.count())): 
-            widget = self.button_layout.itemAt(i).widget()
-            if widget and widget not in self.buttons.values():
-                widget.setParent(None) # Remove and delete
+        # Return the pooled menu buttons; they are hidden, not deleted
+        for i in range(self._dynamic_buttons_used):
+            self._dynamic_buttons[i].hide()
+            self._dynamic_handlers[i] = None
+        self._dynamic_buttons_used = 0
+
+    def update_game_log(self, message, category="general"):
+        """Appends a message to the game log (safe to call from any thread).
+
+        category is one of the core event categories and is used by the log filter.
+        """
+        if QThread.currentThread() is not self.thread():
+            self.log_message.emit(message, category) # Queued to the GUI thread
+            return
+        self._log_buffer.append((message, category))
+        if not self.log_flush_timer.isActive():
+            self.log_flush_timer.start(LOG_FLUSH_INTERVAL)
 
-    def update_game_log(self, message):
-        """Appends a message to the game log."""
-        self.game_log.append(message)
-        self.game_log.verticalScrollBar().setValue(self.game_log.verticalScrollBar().maximum()) # Scroll to bottom
+    def _flush_game_log(self):
+        """Adds all queued log lines to the model at once and scrolls once."""
+        if not self._log_buffer:
+            return
+        scroll_bar = self.game_log.verticalScrollBar()
+        following = scroll_bar.value() >= scroll_bar.maximum() # Don't yank the view while reading history
+        self.game_log_model.append_lines(self._log_buffer)
+        self._log_buffer.clear()
+        if following:
+            self.game_log.scrollToBottom()
+
+    # --- Session Worker Link ---
+    def _send(self, command, *args):
+        """Queues a GameSession command on the worker thread; the result comes back through _apply_state."""
+        self.session_command.emit(command, args)
+
+    def _apply_state(self, changes):
+        """Merges a state diff from the session worker and redraws only what it affects."""
+        self.view.update(changes)
+        if "player" in changes:
+            self.update_stats_display()
+        state = self.view["state"]
+        if state != self.shown_state:
+            self.shown_state = state
+            {"menu": self.show_main_menu, "town": self.show_town_menu, "shop": self.show_shop_menu,
+             "dungeon": self._show_dungeon_menu, "combat": self._start_combat}[state]()
+        elif "inventory" in changes and self.screen in ("inventory", "sell", "combat_items"):
+            {"inventory": self.show_inventory_menu, "sell": self._show_sell_items_menu,
+             "combat_items": self._start_combat}[self.screen]() # Refresh the menu after an item action
+        elif "shop" in changes and self.screen == "shop":
+            self.show_shop_menu() # Restocked after a purchase
 
     def update_stats_display(self):
         """Updates the player stats display."""
-        if self.player:
+        player = self.view.get("player")
+        if player:
             stats_text = (
-                f"Name: {self.player.name} | Level: {self.player.level} "
-                f"(EXP: {self.player.experience}/{NotRouge_game_core.calculate_level_up_exp(self.player.level)}) | "
-                f"HP: {self.player.current_health}/{self.player.max_health} | "
-                f"ATK: {self.player.attack} | DEF: {self.player.defense} | "
-                f"Gold: {self.player.gold}\n"
-                f"Weapon: {self.player.equipped['weapon'].name if self.player.equipped['weapon'] else 'None'} | "
-                f"Armor: {self.player.equipped['armor'].name if self.player.equipped['armor'] else 'None'} | "
-                f"Accessory: {self.player.equipped['accessory'].name if self.player.equipped['accessory'] else 'None'}"
+                f"Name: {player.name} | Level: {player.level} "
+                f"(EXP: {player.experience}/{player.exp_to_next}) | "
+                f"HP: {player.current_health}/{player.max_health} | "
+                f"ATK: {player.attack} | DEF: {player.defense} | "
+                f"Gold: {player.gold}\n"
+                f"Weapon: {player.weapon or 'None'} | "
+                f"Armor: {player.armor or 'None'} | "
+                f"Accessory: {player.accessory or 'None'}"
             )
         else:
             stats_text = "No player data."
@@ -148,57 +457,71 @@ class GameWindow(QMainWindow):
 
     # --- Main Menu Handling ---
     def show_main_menu(self):
+        self.screen = "main_menu"
         self.set_button_visibility("main_menu")
         self.update_game_log("--- NotRouge by Gobytego ---") # Updated title
         self.update_game_log("Welcome, adventurer!")
 
+    def _heroes_listed(self, purpose, heroes):
+        """Continues a new game or load once the worker has listed the saved heroes."""
+        if purpose == "new_game":
+            self._ask_new_hero({name for name, level, gold in heroes})
+        else:
+            self._choose_saved_hero(heroes)
+
     def _handle_new_game(self):
+        self.session_list_heroes.emit("new_game") # Continues in _ask_new_hero
+
+    def _ask_new_hero(self, saved_names):
         text, ok = QInputDialog.getText(self, 'New Game', 'Enter your hero\'s name:')
+        if ok and text and text in saved_names: # Saving would replace that hero's profile
+            reply = QMessageBox.question(self, 'Overwrite Saved Hero',
+                                        f"A hero named {text} already has a saved game. Starting over will overwrite it. Continue?",
+                                        QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+            ok = reply == QMessageBox.Yes
         if ok and text:
-            self.player = NotRouge_game_core.Player(text)
-            self.update_game_log(f"Welcome, {self.player.name}!")
-            self.update_stats_display()
-            self.show_town_menu()
+            self._send("new_game", text)
         else:
             self.update_game_log("New game cancelled.")
 
     def _handle_load_game(self):
-        self.player = NotRouge_game_core.load_game(SAVE_FILE, self.update_game_log)
-        if self.player:
-            self.update_game_log("Game loaded. Returning to town.")
-            self.update_stats_display()
-            self.show_town_menu()
-        else:
+        self.session_list_heroes.emit("load") # Continues in _choose_saved_hero
+
+    def _choose_saved_hero(self, profiles):
+        if not profiles:
             self.update_game_log("No saved game found. Please start a new game.")
-            self.show_main_menu() # Stay on main menu
+            return
+        labels = [f"{name} (Level {level}, {gold} gold)" for name, level, gold in profiles]
+        label, ok = QInputDialog.getItem(self, "Load Game", "Choose a hero:", labels, 0, False)
+        if not ok:
+            self.update_game_log("Load cancelled.")
+            return
+        self._send("load_game", profiles[labels.index(label)][0])
 
     def _save_current_game(self):
-        if self.player:
-            NotRouge_game_core.save_game(self.player, SAVE_FILE, self.update_game_log)
-        else:
-            self.update_game_log("No game in progress to save.")
+        self._send("save")
 
     # --- Town Menu Handling ---
     def show_town_menu(self):
+        self.screen = "town"
         self.set_button_visibility("town")
-        self.update_game_log(f"\n--- Welcome to {self.player.name}'s Town ---")
-        self.update_stats_display()
+        self.update_game_log(f"\n--- Welcome to {self.view['player'].name}'s Town ---")
         self.update_game_log("What would you like to do?")
 
     # --- Shop Menu Handling ---
-    def show_shop_menu(self, display_items=True):
+    def show_shop_menu(self):
+        self.screen = "shop"
         self.set_button_visibility("none") # Hide all main buttons
-        self.update_game_log(f"\n--- Welcome to the Shop! (Gold: {self.player.gold}) ---")
+        self.update_game_log(f"\n--- Welcome to the Shop! (Gold: {self.view['player'].gold}) ---")
 
-        if not NotRouge_game_core.SHOP_ITEMS:
+        if not self.view["shop"]:
             self.update_game_log("The shop is currently empty. No items to display.")
-            self._add_back_button(self.show_town_menu)
+            self._add_back_button(lambda: self._send("enter_town"))
             return
 
-        self.shop_items_display = random.sample(NotRouge_game_core.SHOP_ITEMS, min(5, len(NotRouge_game_core.SHOP_ITEMS)))
         self.update_game_log("--- Buy Items ---")
         
-        for i, item in enumerate(self.shop_items_display):
+        for i, item in enumerate(self.view["shop"]):
             item_desc = f"{i+1}. {item.name} ({item.item_type}) - Cost: {item.cost} gold"
             if item.attack_bonus: item_desc += f" | ATK: +{item.attack_bonus}"
             if item.defense_bonus: item_desc += f" | DEF: +{item.defense_bonus}"
@@ -206,84 +529,56 @@ class GameWindow(QMainWindow):
             if item.heal_amount: item_desc += f" | Heals: {item.heal_amount}"
             self.update_game_log(item_desc)
             
-            button = QPushButton(f"Buy {item.name} ({item.cost}g)")
-            button.clicked.connect(lambda _, idx=i: self._buy_shop_item(idx))
-            self.button_layout.addWidget(button)
-            button.show() # Make sure new buttons are visible
-            button.setStyleSheet("color: white;") # Set button text color to white
+            self._add_dynamic_button(f"Buy {item.name} ({item.cost}g)", lambda idx=i, name=item.name: self._send("buy", idx, name))
 
-        sell_button = QPushButton("Sell Item")
-        sell_button.clicked.connect(self._show_sell_items_menu)
-        sell_button.setStyleSheet("color: white;") # Set button text color to white
-        self.button_layout.addWidget(sell_button)
-        sell_button.show()
+        self._add_dynamic_button("Sell Item", self._show_sell_items_menu)
 
-        self._add_back_button(self.show_town_menu)
-
-    def _buy_shop_item(self, index):
-        chosen_item = self.shop_items_display[index]
-        if self.player.gold >= chosen_item.cost:
-            self.player.gold -= chosen_item.cost
-            self.player.inventory.append(NotRouge_game_core.Item(chosen_item.name, chosen_item.item_type, chosen_item.cost,
-                                             chosen_item.attack_bonus, chosen_item.defense_bonus,
-                                             chosen_item.health_bonus, chosen_item.heal_amount))
-            self.update_game_log(f"You bought {chosen_item.name} for {chosen_item.cost} gold!")
-            self.update_stats_display()
-            self.show_shop_menu(display_items=False) # Refresh shop display
-        else:
-            self.update_game_log("You don't have enough gold!")
-        self.update_stats_display()
+        self._add_back_button(lambda: self._send("enter_town"))
 
     def _show_sell_items_menu(self):
+        self.screen = "sell"
         self.set_button_visibility("none")
-        self.update_game_log(f"--- Sell Items (Your Gold: {self.player.gold}) ---")
-        sellable_items = [item for item in self.player.inventory if item not in self.player.equipped.values()]
+        self.update_game_log(f"--- Sell Items (Your Gold: {self.view['player'].gold}) ---")
+        sellable_items = [(index, item) for index, item in enumerate(self.view["inventory"]) if not item.equipped]
 
         if not sellable_items:
             self.update_game_log("You have no sellable items in your inventory.")
-            self._add_back_button(lambda: self.show_shop_menu(display_items=False)) # Back to main shop
+            self._add_back_button(self.show_shop_menu) # Back to main shop
             return
 
         self.update_game_log("Select an item to sell:")
-        for i, item in enumerate(sellable_items):
-            sell_price = math.floor(item.cost * NotRouge_game_core.SELL_PRICE_MULTIPLIER)
+        for i, (index, item) in enumerate(sellable_items):
+            sell_price = NotRouge_game_core.sell_price(item)
             item_desc = f"{i+1}. {item.name} (Type: {item.item_type}) - Sell for: {sell_price} gold"
             self.update_game_log(item_desc)
             
-            button = QPushButton(f"Sell {item.name} ({sell_price}g)")
-            button.clicked.connect(lambda _, itm=item: self._sell_item_action(itm))
-            button.setStyleSheet("color: white;") # Set button text color to white
-            self.button_layout.addWidget(button)
-            button.show()
+            self._add_dynamic_button(f"Sell {item.name} ({sell_price}g)", lambda idx=index, itm=item: self._sell_item_action(idx, itm))
 
-        self._add_back_button(lambda: self.show_shop_menu(display_items=False)) # Back to main shop
+        self._add_back_button(self.show_shop_menu) # Back to main shop
 
-    def _sell_item_action(self, item_to_sell):
+    def _sell_item_action(self, index, item_to_sell):
         reply = QMessageBox.question(self, 'Confirm Sale', 
-                                    f"Are you sure you want to sell {item_to_sell.name} for {math.floor(item_to_sell.cost * NotRouge_game_core.SELL_PRICE_MULTIPLIER)} gold?",
+                                    f"Are you sure you want to sell {item_to_sell.name} for {NotRouge_game_core.sell_price(item_to_sell)} gold?",
                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
         if reply == QMessageBox.Yes:
-            sell_price = math.floor(item_to_sell.cost * NotRouge_game_core.SELL_PRICE_MULTIPLIER)
-            self.player.gold += sell_price
-            self.player.inventory.remove(item_to_sell)
-            self.update_game_log(f"You sold {item_to_sell.name} for {sell_price} gold!")
-            self.update_stats_display()
+            self._send("sell", index, item_to_sell.name) # The sell menu refreshes when the inventory changes
         else:
             self.update_game_log("Sale cancelled.")
-        self._show_sell_items_menu() # Refresh sell menu
+            self._show_sell_items_menu()
 
 
     # --- Inventory Menu Handling ---
     def show_inventory_menu(self):
+        self.screen = "inventory"
         self.set_button_visibility("none")
         self.update_game_log("\n--- Inventory Management ---")
-        if not self.player.inventory:
+        if not self.view["inventory"]:
             self.update_game_log("Your inventory is empty.")
             self._add_back_button(self.show_town_menu)
             return
 
         self.update_game_log("Select an item to use/equip or throw away:")
-        for i, item in enumerate(self.player.inventory):
+        for i, item in enumerate(self.view["inventory"]):
             item_desc = f"{i+1}. {item.name} ({item.item_type})"
             if item.attack_bonus: item_desc += f" | ATK: +{item.attack_bonus}"
             if item.defense_bonus: item_desc += f" | DEF: +{item.defense_bonus}"
@@ -292,37 +587,16 @@ class GameWindow(QMainWindow):
             self.update_game_log(item_desc)
             
             button_text = f"Use {item.name}" if item.item_type == "consumable" else f"Equip {item.name}"
-            button = QPushButton(button_text)
-            button.clicked.connect(lambda _, itm=item: self._handle_inventory_item_action(itm))
-            button.setStyleSheet("color: white;") # Set button text color to white
-            self.button_layout.addWidget(button)
-            button.show()
+            self._add_dynamic_button(button_text, lambda idx=i, name=item.name: self._send("use_item", idx, name))
 
             # Add throw away button for each item
-            throw_button = QPushButton(f"Throw Away {item.name}")
-            throw_button.clicked.connect(lambda _, itm=item: self._throw_away_item_action(itm))
-            throw_button.setStyleSheet("color: white;") # Set button text color to white
-            self.button_layout.addWidget(throw_button)
-            throw_button.show()
+            self._add_dynamic_button(f"Throw Away {item.name}", lambda idx=i, itm=item: self._throw_away_item_action(idx, itm))
 
         self._add_back_button(self.show_town_menu)
 
-    def _handle_inventory_item_action(self, chosen_item):
-        if chosen_item.item_type == "consumable":
-            if chosen_item.heal_amount > 0:
-                self.player.heal(chosen_item.heal_amount, self.update_game_log)
-                self.player.inventory.remove(chosen_item)
-                self.update_game_log(f"You used a {chosen_item.name}.")
-            else:
-                self.update_game_log("This item cannot be used.")
-        else: # Equipable item
-            self.player.equip_item(chosen_item, self.update_game_log)
-            self.update_game_log(f"You equipped {chosen_item.name}.")
-        self.show_inventory_menu() # Refresh inventory display
-
-    def _throw_away_item_action(self, item_to_throw):
+    def _throw_away_item_action(self, index, item_to_throw):
         # Prevent throwing away equipped items directly
-        if item_to_throw in self.player.equipped.values():
+        if item_to_throw.equipped:
             self.update_game_log(f"You cannot throw away {item_to_throw.name} while it is equipped. Unequip it first.")
             return
 
@@ -330,233 +604,70 @@ class GameWindow(QMainWindow):
                                     f"Are you sure you want to throw away {item_to_throw.name}? This cannot be undone!",
                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
         if reply == QMessageBox.Yes:
-            self.player.inventory.remove(item_to_throw)
-            self.update_game_log(f"You threw away {item_to_throw.name}.")
+            self._send("discard", index, item_to_throw.name) # The menu refreshes when the inventory changes
         else:
             self.update_game_log("Discard cancelled.")
-        self.show_inventory_menu() # Refresh inventory display
+            self.show_inventory_menu()
 
 
     def _add_back_button(self, callback):
-        back_button = QPushButton("Back")
-        back_button.clicked.connect(callback)
-        back_button.setStyleSheet("color: white;") # Set button text color to white
-        self.button_layout.addWidget(back_button)
-        back_button.show()
+        self._add_dynamic_button("Back", callback)
 
 
     # --- Dungeon Handling ---
-    def _start_dungeon(self):
-        if not NotRouge_game_core.DUNGEON_ENEMIES:
-            self.update_game_log("The dungeon seems eerily quiet... (No enemies loaded).")
-            self.show_town_menu()
-            return
-        self.update_game_log("You enter the dark and winding dungeon...")
-        self.dungeon_room_count = 0
-        self.max_dungeon_rooms = random.randint(3, 7)
-        self._dungeon_next_room()
-
-    def _dungeon_next_room(self):
-        if self.player.current_health <= 0:
-            NotRouge_game_core.handle_death(self.player, self.update_game_log)
-            self.show_town_menu() # After death, return to town
-            return
-
-        if self.dungeon_room_count >= self.max_dungeon_rooms:
-            self.update_game_log("You have cleared this section of the dungeon! You return to town.")
-            self.show_town_menu()
-            return
-
-        self.dungeon_room_count += 1
-        self.update_game_log(f"\n--- Dungeon Depth: {self.dungeon_room_count}/{self.max_dungeon_rooms} ---")
-        self.update_game_log("You explore deeper...")
-        
-        encounter_type = random.choices(["combat", "nothing", "treasure", "healing"], weights=[0.6, 0.2, 0.15, 0.05], k=1)[0]
-
-        if encounter_type == "combat":
-            enemy_template = random.choice(NotRouge_game_core.DUNGEON_ENEMIES)
-            self.current_enemy = NotRouge_game_core.Enemy(enemy_template.name, enemy_template.health_full, enemy_template.attack,
-                                       enemy_template.defense, enemy_template.gold_drop, enemy_template.exp_drop)
-            self.update_game_log(f"A wild {self.current_enemy.name} appears!")
-            self._start_combat()
-        elif encounter_type == "treasure":
-            gold_found = random.randint(20, 100)
-            self.player.gold += gold_found
-            self.update_game_log(f"You found a hidden chest with {gold_found} gold!")
-            self.update_stats_display()
-            self._add_continue_dungeon_button()
-        elif encounter_type == "healing":
-            heal_amount = random.randint(20, 60)
-            self.player.heal(heal_amount, self.update_game_log)
-            self.update_game_log(f"You found a refreshing spring and healed {heal_amount} health!")
-            self.update_stats_display()
-            self._add_continue_dungeon_button()
-        else: # "nothing"
-            self.update_game_log("You found nothing of interest in this area.")
-            self._add_continue_dungeon_button()
-
-    def _add_continue_dungeon_button(self):
+    def _show_dungeon_menu(self):
+        self.screen = "dungeon"
         self.set_button_visibility("none")
-        continue_button = QPushButton("Continue Exploring")
-        continue_button.clicked.connect(self._dungeon_next_room)
-        continue_button.setStyleSheet("color: white;") # Set button text color to white
-        self.button_layout.addWidget(continue_button)
-        continue_button.show()
+        self._add_dynamic_button("Continue Exploring", lambda: self._send("next_room"))
 
-        retreat_button = QPushButton("Retreat to Town")
-        retreat_button.clicked.connect(self.show_town_menu)
-        retreat_button.setStyleSheet("color: white;") # Set button text color to white
-        self.button_layout.addWidget(retreat_button)
-        retreat_button.show()
+        self._add_dynamic_button("Retreat to Town", lambda: self._send("enter_town"))
 
 
     # --- Combat Handling ---
+    # The session logs the fight itself; these only switch the buttons.
     def _start_combat(self):
+        self.screen = "combat"
         self.set_button_visibility("combat")
-        self.update_game_log(f"--- Combat: {self.player.name} vs {self.current_enemy.name} ---")
-        self.update_game_log(f"{self.player.name} HP: {self.player.current_health}/{self.player.max_health} | ATK: {self.player.attack} | DEF: {self.player.defense}")
-        self.update_game_log(f"{self.current_enemy.name} HP: {self.current_enemy.health}/{self.current_enemy.health_full} | ATK: {self.current_enemy.attack} | DEF: {self.current_enemy.defense}")
-        self.update_game_log("What will you do?")
-
 
     def _combat_action(self, action_type):
-        if self.player.current_health <= 0 or self.current_enemy.health <= 0:
-            return # Combat already over
-
-        self.auto_attack_timer.stop() # Stop auto-attack if a manual action is chosen
-
-        if action_type == "attack":
-            self._perform_player_attack()
-            if self.current_enemy and self.current_enemy.health > 0: # Check if enemy still alive after player's attack
-                self._perform_enemy_attack()
-            self._check_combat_end()
-        elif action_type == "use_item":
+        if action_type == "use_item":
+            self._send("stop_auto_attack") # A manual action stops auto-attack
             self._show_combat_item_menu()
-        elif action_type == "flee":
-            self._perform_flee_attempt()
-            self._check_combat_end()
-        elif action_type == "auto_attack":
-            self.update_game_log("Initiating auto-attack...")
-            self._auto_attack_turn() # Start immediately
-            if self.player.current_health > 1 and self.current_enemy and self.current_enemy.health > 0:
-                 self.auto_attack_timer.start(100) # Faster turns in auto-attack
-
-
-    def _perform_player_attack(self):
-        player_damage = max(1, self.player.attack + random.randint(-5, 5))
-        enemy_dead = self.current_enemy.take_damage(player_damage, self.update_game_log)
-        self.update_game_log(f"You hit the {self.current_enemy.name} for {player_damage} damage!")
-        if enemy_dead:
-            self.update_game_log(f"You defeated the {self.current_enemy.name}!")
-            self.player.gold += self.current_enemy.gold_drop
-            self.player.gain_exp(self.current_enemy.exp_drop, self.update_game_log)
-            self.update_game_log(f"You gained {self.current_enemy.gold_drop} gold and {self.current_enemy.exp_drop} experience.")
-            self.current_enemy = None # Mark enemy as defeated
-
-    def _perform_enemy_attack(self):
-        if self.current_enemy and self.current_enemy.health > 0:
-            enemy_damage = max(1, self.current_enemy.attack + random.randint(-3, 3))
-            player_dead = self.player.take_damage(enemy_damage, self.update_game_log)
-            self.update_game_log(f"The {self.current_enemy.name} hits you for {enemy_damage} damage!")
-            if player_dead:
-                self.current_enemy = None # Player died, combat ends
-
-    def _check_combat_end(self):
-        self.update_stats_display() # Update player stats after each action
-        if self.player.current_health <= 0:
-            self.auto_attack_timer.stop()
-            NotRouge_game_core.handle_death(self.player, self.update_game_log) # Pass log function
-            # show_town_menu is now called by _handle_player_death
-        elif self.current_enemy is None: # Enemy defeated
-            self.auto_attack_timer.stop()
-            self._add_continue_dungeon_button() # Back to dungeon flow
         else:
-            # If combat not ended, display current state for next turn (unless auto-attacking)
-            self.update_game_log(f"--- Combat: {self.player.name} HP: {self.player.current_health}/{self.player.max_health} vs {self.current_enemy.name} HP: {self.current_enemy.health}/{self.current_enemy.health_full} ---")
-            self.update_game_log("What will you do next?")
-
+            self._send({"attack": "attack", "flee": "flee", "auto_attack": "start_auto_attack",
+                        "resolve": "resolve_auto_attack"}[action_type])
 
     def _show_combat_item_menu(self):
+        self.screen = "combat_items"
         self.set_button_visibility("none")
-        consumables = [item for item in self.player.inventory if item.item_type == "consumable"]
+        consumables = [(index, item) for index, item in enumerate(self.view["inventory"]) if item.item_type == "consumable"]
         if not consumables:
             self.update_game_log("You have no usable items.")
             self._start_combat() # Return to combat menu
             return
 
         self.update_game_log("\n--- Your Consumable Items ---")
-        for i, item in enumerate(consumables):
+        for i, (index, item) in enumerate(consumables):
             self.update_game_log(f"{i+1}. {item.name} (Heals: {item.heal_amount})")
-            button = QPushButton(f"Use {item.name} (Heals: {item.heal_amount})")
-            button.clicked.connect(lambda _, itm=item: self._use_combat_item(itm))
-            button.setStyleSheet("color: white;") # Set button text color to white
-            self.button_layout.addWidget(button)
-            button.show()
+            self._add_dynamic_button(f"Use {item.name} (Heals: {item.heal_amount})",
+                                     lambda idx=index, name=item.name: self._send("use_combat_item", idx, name))
         
-        back_button = QPushButton("Back to Combat")
-        back_button.clicked.connect(self._start_combat)
-        back_button.setStyleSheet("color: white;") # Set button text color to white
-        self.button_layout.addWidget(back_button)
-        back_button.show()
-
-    def _use_combat_item(self, item_to_use):
-        if item_to_use.heal_amount > 0:
-            self.player.heal(item_to_use.heal_amount, self.update_game_log)
-            self.player.inventory.remove(item_to_use)
-            self.update_game_log(f"You used a {item_to_use.name}.")
-        else:
-            self.update_game_log("This item cannot be used.")
-        self._start_combat() # Return to combat menu after using item
-
-
-    def _perform_flee_attempt(self):
-        if random.random() < 0.5:
-            self.update_game_log("You successfully fled from combat!")
-            self.current_enemy = None # End combat
-        else:
-            self.update_game_log("You failed to flee!")
-            self._perform_enemy_attack() # Enemy gets a free hit if flee fails
-
-    def _auto_attack_turn(self):
-        # Check conditions to stop auto-attack
-        if self.player.current_health <= 1:
-            self.update_game_log("\nYour health is critically low (1 HP remaining)! Auto-attack stopped.")
-            self.auto_attack_timer.stop()
-            self._start_combat() # Return to manual combat options
-            return
-        if self.current_enemy is None or self.current_enemy.health <= 0:
-            self.update_game_log("Enemy defeated.")
-            self.auto_attack_timer.stop()
-            self._add_continue_dungeon_button() # Enemy defeated, move on
-            return
-
-        # Player attacks
-        self._perform_player_attack()
-        
-        # Check if enemy is defeated after player's attack
-        if self.current_enemy is None or self.current_enemy.health <= 0:
-            self.auto_attack_timer.stop()
-            self._add_continue_dungeon_button()
-            return
-
-        # Enemy attacks
-        self._perform_enemy_attack()
-
-        # Re-check player health after enemy attack
-        if self.player.current_health <= 0:
-            self.auto_attack_timer.stop()
-            NotRouge_game_core.handle_death(self.player, self.update_game_log) # Pass log function
-            # show_town_menu is now called by handle_death from NotRouge_game_core
-            return # Exit this auto-attack turn as player is dead
+        self._add_dynamic_button("Back to Combat", self._start_combat)
 
-        # Update combat display (optional for auto-attack but useful for feedback)
-        if self.current_enemy: # Still in combat
-             self.update_game_log(f"--- Auto-Combat: {self.player.name} HP: {self.player.current_health}/{self.player.max_health} vs {self.current_enemy.name} HP: {self.current_enemy.health}/{self.current_enemy.health_full} ---")
+    def closeEvent(self, event):
+        """Stops the session worker and finishes any background saves before the window closes."""
+        self.session_stop.emit()
+        self.session_thread.wait()
+        self.worker.session.autosave.flush()
+        self.saver.close()
+        self.profiles.close()
+        super().closeEvent(event)
 
 
 # --- Main Application Entry Point ---
 if __name__ == "__main__":
     app = QApplication([])
-    game_window = GameWindow()
+    pack = NotRouge_game_core.ContentPack.from_directory(sys.argv[1]) if len(sys.argv) > 1 else None
+    game_window = GameWindow(pack)
     game_window.show()
     app.exec_()
@@ -0,0 +1,449 @@
+import sys
+import time
+import random
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import NotRouge_game_core # Import the core game logic
+
+try:
+    import numpy as np # Optional: only needed for the vectorized evaluator
+except ImportError:
+    np = None
+
+# --- Batch Combat Simulation (Headless) ---
+
+class FightReport:
+    """Aggregated results of many fights between one player build and one enemy."""
+    def __init__(self, enemy_name, level, fights, wins, total_turns_to_kill, total_damage_taken, draws=0):
+        self.enemy_name = enemy_name
+        self.level = level
+        self.fights = fights
+        self.wins = wins
+        self.draws = draws # Fights still going after the turn cap; neither wins nor losses
+        self.total_turns_to_kill = total_turns_to_kill # Summed over won fights only
+        self.total_damage_taken = total_damage_taken # Summed over all fights
+
+    @property
+    def win_rate(self):
+        return self.wins / self.fights if self.fights else 0.0
+
+    @property
+    def losses(self):
+        return self.fights - self.wins - self.draws
+
+    @property
+    def loss_rate(self):
+        return self.losses / self.fights if self.fights else 0.0
+
+    @property
+    def draw_rate(self):
+        return self.draws / self.fights if self.fights else 0.0
+
+    @property
+    def mean_turns_to_kill(self):
+        return self.total_turns_to_kill / self.wins if self.wins else float("inf")
+
+    @property
+    def expected_damage_taken(self):
+        return self.total_damage_taken / self.fights if self.fights else 0.0
+
+def simulate_fights(player, enemy, fights, rng=None):
+    """Runs many independent fights of a player build against an enemy template.
+
+    Neither object is modified; every fight starts from the player's current
+    health and the enemy's full health.
+    """
+    rng = rng or random.Random()
+    fight = NotRouge_game_core.simulate_fight_stats
+    player_stats = (player.current_health, player.attack, player.defense)
+    enemy_stats = (enemy.health_full, enemy.attack, enemy.defense)
+    wins = 0
+    draws = 0
+    total_turns_to_kill = 0
+    total_damage_taken = 0
+    for _ in range(fights):
+        won, turns, damage_taken, draw = fight(*player_stats, *enemy_stats, rng)
+        if won:
+            wins += 1
+            total_turns_to_kill += turns
+        draws += draw
+        total_damage_taken += damage_taken
+    return FightReport(enemy.name, player.level, fights, wins, total_turns_to_kill, total_damage_taken, draws)
+
+def simulate_enemy_grid(levels, enemies, fights_per_cell, seed=None):
+    """Simulates every (player level, enemy) pair with an unequipped player.
+
+    Returns a list of FightReport objects, ordered by level then enemy.
+    """
+    rng = random.Random(seed)
+    reports = []
+    for level in levels:
+        player = NotRouge_game_core.create_player_at_level(level)
+        for enemy in enemies:
+            reports.append(simulate_fights(player, enemy, fights_per_cell, rng))
+    return reports
+
+# --- Vectorized Monte Carlo Evaluation (NumPy) ---
+
+def vectorized_win_probabilities(player, enemies, fights, seed=None, max_turns=NotRouge_game_core.MAX_COMBAT_TURNS,
+                                 with_draws=False):
+    """Estimates the player's win probability against every enemy at once.
+
+    All fights for all enemies are advanced together as flat NumPy arrays of
+    HP, with the per-enemy attack/defense looked up by index; finished fights
+    are dropped each turn. Returns a float array aligned with enemies. Fights
+    still running after max_turns are draws, neither wins nor losses; pass
+    with_draws=True to get (win_probabilities, draw_probabilities).
+    """
+    if np is None:
+        raise ImportError("The vectorized evaluator requires NumPy (pip install numpy).")
+    rng = np.random.default_rng(seed)
+    enemy_count = len(enemies)
+    enemy_health = np.array([enemy.health_full for enemy in enemies], dtype=np.int64)
+    enemy_attack = np.array([enemy.attack for enemy in enemies], dtype=np.int64)
+    enemy_defense = np.array([enemy.defense for enemy in enemies], dtype=np.int64)
+
+    # Same damage model as the game: max(0, max(1, atk + variance) - def)
+    wins = np.zeros(enemy_count, dtype=np.int64)
+    index = np.repeat(np.arange(enemy_count), fights)
+    e_hp = enemy_health[index]
+    p_hp = np.full(index.size, player.current_health, dtype=np.int64)
+    for _ in range(max_turns):
+        if index.size == 0:
+            break
+        raw = player.attack + rng.integers(-5, 6, size=index.size)
+        e_hp -= np.maximum(0, np.maximum(1, raw) - enemy_defense[index])
+        won = e_hp <= 0
+        wins += np.bincount(index[won], minlength=enemy_count)
+        alive = ~won
+        index, e_hp, p_hp = index[alive], e_hp[alive], p_hp[alive]
+
+        raw = enemy_attack[index] + rng.integers(-3, 4, size=index.size)
+        p_hp -= np.maximum(0, np.maximum(1, raw) - player.defense)
+        alive = p_hp > 0
+        index, e_hp, p_hp = index[alive], e_hp[alive], p_hp[alive]
+    if with_draws:
+        return wins / fights, np.bincount(index, minlength=enemy_count) / fights
+    return wins / fights
+
+def vectorized_level_sweep(levels, enemies, fights, seed=None, with_draws=False):
+    """Win probabilities of an unequipped player at each level against every enemy.
+
+    Returns a (len(levels), len(enemies)) float array, or a pair of them
+    (wins, draws) with with_draws=True.
+    """
+    if np is None:
+        raise ImportError("The vectorized evaluator requires NumPy (pip install numpy).")
+    rng = np.random.default_rng(seed)
+    rows = []
+    draw_rows = []
+    for level in levels:
+        player = NotRouge_game_core.create_player_at_level(level)
+        wins, draws = vectorized_win_probabilities(player, enemies, fights, rng, with_draws=True)
+        rows.append(wins)
+        draw_rows.append(draws)
+    empty = np.zeros((0, len(enemies)))
+    wins = np.vstack(rows) if rows else empty
+    if with_draws:
+        return wins, (np.vstack(draw_rows) if draw_rows else empty)
+    return wins
+
+# --- Parallel Dungeon Run Simulation ---
+
+class DungeonRunStats:
+    """Additive totals over many simulated progression runs."""
+    FIELDS = ("runs", "dungeons", "deaths", "rooms_explored", "fights_won",
+              "gold_found", "gold_from_enemies", "exp_gained", "final_level_total", "final_gold_total")
+
+    def __init__(self):
+        for field in self.FIELDS:
+            setattr(self, field, 0)
+        self.max_level = 0
+
+    def merge(self, other):
+        """Adds another DungeonRunStats into this one."""
+        for field in self.FIELDS:
+            setattr(self, field, getattr(self, field) + getattr(other, field))
+        self.max_level = max(self.max_level, other.max_level)
+        return self
+
+def derive_seed(seed, stream):
+    """Derives an independent 64-bit seed for a numbered RNG stream."""
+    digest = hashlib.sha256(f"NotRouge:{seed}:{stream}".encode()).digest()
+    return int.from_bytes(digest[:8], "little")
+
+def _quiet_content():
+    """Loaded (shop items, enemies), loading them without log output if needed (worker processes)."""
+    if not NotRouge_game_core.content_loaded():
+        NotRouge_game_core.load_content(log_function=None)
+    return NotRouge_game_core.SHOP_ITEMS, NotRouge_game_core.DUNGEON_ENEMIES
+
+def _simulate_run_chunk(seed, chunk_index, runs, start_level, dungeons_per_run):
+    """Simulates one chunk of runs with its own RNG stream (runs in worker processes)."""
+    rng = random.Random(derive_seed(seed, chunk_index))
+    enemies = _quiet_content()[1]
+    stats = DungeonRunStats()
+    for _ in range(runs):
+        player = NotRouge_game_core.create_player_at_level(start_level)
+        for _ in range(dungeons_per_run):
+            result = NotRouge_game_core.run_dungeon(player, enemies, rng)
+            stats.dungeons += 1
+            stats.deaths += result.died
+            stats.rooms_explored += result.rooms_explored
+            stats.fights_won += result.fights_won
+            stats.gold_found += result.gold_found
+            stats.gold_from_enemies += result.gold_from_enemies
+            stats.exp_gained += result.exp_gained
+        stats.runs += 1
+        stats.final_level_total += player.level
+        stats.final_gold_total += player.gold
+        stats.max_level = max(stats.max_level, player.level)
+    return stats
+
+def simulate_dungeon_runs(runs, start_level=1, dungeons_per_run=1, seed=0, workers=None, chunk_size=1000):
+    """Simulates many independent progression runs across a process pool.
+
+    Runs are split into fixed-size chunks and chunk k always uses the RNG
+    stream derive_seed(seed, k), so the totals are identical for any worker
+    count. workers=1 runs everything in this process.
+    """
+    chunks = []
+    for chunk_index, first_run in enumerate(range(0, runs, chunk_size)):
+        chunks.append((seed, chunk_index, min(chunk_size, runs - first_run), start_level, dungeons_per_run))
+
+    total = DungeonRunStats()
+    if workers == 1:
+        for chunk in chunks:
+            total.merge(_simulate_run_chunk(*chunk))
+        return total
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for stats in pool.map(_simulate_run_chunk, *zip(*chunks)):
+            total.merge(stats)
+    return total
+
+def print_run_stats(stats, out=sys.stdout):
+    """Prints averaged dungeon run statistics."""
+    dungeons = stats.dungeons or 1
+    runs = stats.runs or 1
+    out.write(f"Runs: {stats.runs} ({stats.dungeons} dungeons)\n")
+    out.write(f"Death rate per dungeon: {stats.deaths / dungeons * 100:.2f}%\n")
+    out.write(f"Rooms explored per dungeon: {stats.rooms_explored / dungeons:.2f}\n")
+    out.write(f"Fights won per dungeon: {stats.fights_won / dungeons:.2f}\n")
+    out.write(f"Gold per dungeon: {(stats.gold_found + stats.gold_from_enemies) / dungeons:.1f}\n")
+    out.write(f"EXP per dungeon: {stats.exp_gained / dungeons:.1f}\n")
+    out.write(f"Final level: {stats.final_level_total / runs:.2f} avg, {stats.max_level} max\n")
+    out.write(f"Final gold: {stats.final_gold_total / runs:.1f} avg\n")
+
+# --- Long-Horizon Progression Simulation ---
+
+class RunningStats:
+    """Streaming count/mean/variance/min/max (Welford) in constant memory."""
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum = None
+        self.maximum = None
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+
+    def merge(self, other):
+        """Combines another RunningStats into this one (Chan et al. parallel update)."""
+        if not other.count:
+            return self
+        if not self.count:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.minimum, self.maximum = other.minimum, other.maximum
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        return self
+
+    @property
+    def stddev(self):
+        return (self.m2 / self.count) ** 0.5 if self.count else 0.0
+
+class ProgressionCurves:
+    """Per-cycle streaming aggregates for one cohort of bots.
+
+    Memory depends only on the number of cycles and metrics, never on the
+    number of bots simulated.
+    """
+    METRICS = ("level", "gold", "gear_score", "deaths")
+
+    def __init__(self, cycles):
+        self.cycles = cycles
+        self.turns = 0 # Combat turns played, for throughput reporting
+        self.curves = {metric: [RunningStats() for _ in range(cycles)] for metric in self.METRICS}
+
+    def record(self, cycle, **values):
+        for metric, value in values.items():
+            self.curves[metric][cycle].add(value)
+
+    def merge(self, other):
+        self.turns += other.turns
+        for metric in self.METRICS:
+            for mine, theirs in zip(self.curves[metric], other.curves[metric]):
+                mine.merge(theirs)
+        return self
+
+def gear_score(player):
+    """Total stat bonus of the player's equipped gear (health counts at a fifth)."""
+    score = 0
+    for item in player.equipped.values():
+        if item:
+            score += item.attack_bonus + item.defense_bonus + item.health_bonus / 5
+    return score
+
+def _simulate_progression_chunk(seed, chunk_index, bots, cycles, start_level, policy_name):
+    """Plays a chunk of bots through every cycle with one RNG stream (runs in worker processes)."""
+    rng = random.Random(derive_seed(seed, chunk_index))
+    shop_items, enemies = _quiet_content()
+    policy = NotRouge_game_core.BOT_POLICIES[policy_name]()
+    curves = ProgressionCurves(cycles)
+    for _ in range(bots):
+        player = NotRouge_game_core.create_player_at_level(start_level)
+        deaths = 0
+        for cycle in range(cycles):
+            NotRouge_game_core.visit_town(player, policy, shop_items, rng)
+            result = NotRouge_game_core.run_dungeon(player, enemies, rng, policy=policy)
+            deaths += result.died
+            curves.turns += result.turns
+            curves.record(cycle, level=player.level, gold=player.gold, gear_score=gear_score(player), deaths=deaths)
+    return curves
+
+def simulate_progression(bots, cycles, start_level=1, seed=0, workers=None, chunk_size=250, policy_name="auto"):
+    """Plays bots through shop/dungeon cycles and returns their ProgressionCurves.
+
+    policy_name picks the bot from NotRouge_game_core.BOT_POLICIES; the
+    default "auto" bot is the cheapest to run. Chunked and seeded like
+    simulate_dungeon_runs, so results don't depend on the worker count.
+    """
+    chunks = []
+    for chunk_index, first_bot in enumerate(range(0, bots, chunk_size)):
+        chunks.append((seed, chunk_index, min(chunk_size, bots - first_bot), cycles, start_level, policy_name))
+
+    total = ProgressionCurves(cycles)
+    if workers == 1:
+        for chunk in chunks:
+            total.merge(_simulate_progression_chunk(*chunk))
+        return total
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for curves in pool.map(_simulate_progression_chunk, *zip(*chunks)):
+            total.merge(curves)
+    return total
+
+def print_progression(curves, every=10, out=sys.stdout):
+    """Prints the mean (and spread) of each progression curve every few cycles."""
+    out.write(f"{'Cycle':>6} {'Level':>14} {'Gold':>16} {'Gear':>14} {'Deaths':>8}\n")
+    for cycle in range(curves.cycles):
+        if (cycle + 1) % every and cycle != curves.cycles - 1:
+            continue
+        level = curves.curves["level"][cycle]
+        gold = curves.curves["gold"][cycle]
+        gear = curves.curves["gear_score"][cycle]
+        deaths = curves.curves["deaths"][cycle]
+        out.write(f"{cycle + 1:>6} {level.mean:>7.2f} ±{level.stddev:<5.1f} {gold.mean:>8.1f} ±{gold.stddev:<6.0f} "
+                  f"{gear.mean:>6.1f} ±{gear.stddev:<6.1f} {deaths.mean:>8.2f}\n")
+
+def print_reports(reports, out=sys.stdout):
+    """Prints fight reports as an aligned text table."""
+    out.write(f"{'Level':>5}  {'Enemy':<24} {'Win %':>7} {'Draw %':>7} {'Turns':>7} {'Dmg taken':>10}\n")
+    for report in reports:
+        out.write(f"{report.level:>5}  {report.enemy_name:<24} {report.win_rate * 100:>6.1f}% "
+                  f"{report.draw_rate * 100:>6.1f}% {report.mean_turns_to_kill:>7.2f} "
+                  f"{report.expected_damage_taken:>10.1f}\n")
+
+def parse_levels(text):
+    """Parses '1-10' or '1,5,10' (or a mix) into a list of levels."""
+    levels = []
+    for part in text.split(","):
+        if "-" in part:
+            low, high = part.split("-", 1)
+            levels.extend(range(int(low), int(high) + 1))
+        else:
+            levels.append(int(part))
+    return levels
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless NotRouge combat balance simulator.")
+    parser.add_argument("--levels", default="1-10", help="Player levels to simulate, e.g. '1-10' or '1,5,10'.")
+    parser.add_argument("--fights", type=int, default=1000, help="Fights per (level, enemy) cell.")
+    parser.add_argument("--enemy", action="append", help="Only simulate enemies with this name (repeatable).")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for reproducible results.")
+    parser.add_argument("--vectorized", action="store_true", help="Use the NumPy evaluator (win rates only).")
+    parser.add_argument("--exact", action="store_true", help="Compute exact win rates instead of sampling.")
+    parser.add_argument("--runs", type=int, default=0, help="Simulate this many full dungeon runs instead of single fights.")
+    parser.add_argument("--dungeons", type=int, default=1, help="Dungeons per run (progress carries over, deaths apply).")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes for --runs/--bots (default: all cores).")
+    parser.add_argument("--bots", type=int, default=0, help="Simulate this many bot players through shop/dungeon cycles.")
+    parser.add_argument("--cycles", type=int, default=100, help="Shop/dungeon cycles per bot for --bots.")
+    parser.add_argument("--policy", default="auto", choices=sorted(NotRouge_game_core.BOT_POLICIES),
+                        help="Bot policy for --bots.")
+    args = parser.parse_args(argv)
+
+    if args.bots:
+        start = time.perf_counter()
+        curves = simulate_progression(args.bots, args.cycles, parse_levels(args.levels)[0], args.seed or 0,
+                                      args.workers, policy_name=args.policy)
+        elapsed = time.perf_counter() - start
+        print_progression(curves, every=max(1, args.cycles // 20))
+        print(f"\nSimulated {args.bots * args.cycles} cycles ({curves.turns} combat turns) in {elapsed:.2f}s "
+              f"- {curves.turns / elapsed:,.0f} turns/s.")
+        return
+
+    if args.runs:
+        start = time.perf_counter()
+        stats = simulate_dungeon_runs(args.runs, parse_levels(args.levels)[0], args.dungeons,
+                                      args.seed or 0, args.workers)
+        elapsed = time.perf_counter() - start
+        print_run_stats(stats)
+        print(f"\nSimulated {stats.dungeons} dungeons in {elapsed:.2f}s.")
+        return
+
+    enemies = _quiet_content()[1]
+    if args.enemy:
+        enemies = [enemy for enemy in enemies if enemy.name in args.enemy]
+    levels = parse_levels(args.levels)
+    start = time.perf_counter()
+    if args.exact:
+        print(f"{'Level':>5}  {'Enemy':<24} {'Win %':>7} {'HP left':>8}")
+        for level in levels:
+            player = NotRouge_game_core.create_player_at_level(level)
+            for enemy in enemies:
+                outcome = NotRouge_game_core.solve_fight_for(player, enemy)
+                print(f"{level:>5}  {enemy.name:<24} {outcome.win_probability * 100:>6.2f}% {outcome.expected_hp_left:>8.1f}")
+        elapsed = time.perf_counter() - start
+        print(f"\nSolved {len(levels) * len(enemies)} matchups exactly in {elapsed:.2f}s.")
+        return
+    if args.vectorized:
+        probabilities, draws = vectorized_level_sweep(levels, enemies, args.fights, args.seed, with_draws=True)
+        elapsed = time.perf_counter() - start
+        print(f"{'Level':>5}  {'Enemy':<24} {'Win %':>7} {'Draw %':>7}")
+        for row, draw_row, level in zip(probabilities, draws, levels):
+            for probability, draw, enemy in zip(row, draw_row, enemies):
+                print(f"{level:>5}  {enemy.name:<24} {probability * 100:>6.1f}% {draw * 100:>6.1f}%")
+        total_fights = args.fights * len(levels) * len(enemies)
+    else:
+        reports = simulate_enemy_grid(levels, enemies, args.fights, args.seed)
+        elapsed = time.perf_counter() - start
+        print_reports(reports)
+        total_fights = args.fights * len(reports)
+    print(f"\nSimulated {total_fights} fights in {elapsed:.2f}s.")
+
+if __name__ == "__main__":
+    main()